@@ -1,39 +1,19 @@
-"""Application factory for the Cognito demo API."""
+"""Cognito demo API.
 
-from flask import Flask
-from flask_cors import CORS
-from flasgger import Swagger
+``create_app`` (and the module-level ``app``) are resolved on first use, so
+importing a submodule such as ``app.tokens`` does not load Flask, the
+routes or boto3.
+"""
 
-from .config import settings
-from .routes import register_blueprints
-from .swagger import build_swagger_template
 
+def __getattr__(name):
+    if name == "create_app":
+        from .factory import create_app
 
-def create_app() -> Flask:
-    app = Flask(__name__)
-    app.secret_key = settings.flask_secret_key
+        return create_app
+    if name == "app":
+        from .factory import create_app
 
-    CORS(app, resources={r"/*": {"origins": "*"}}, allow_headers=["Content-Type", "Authorization"], methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"])
-
-    # Ensure CORS headers are added even for errors or unhandled routes
-    @app.after_request
-    def after_request(response):
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS,PATCH')
-        return response
-
-    # Disable the favicon to prevent the UnicodeDecodeError with aws-wsgi
-    swagger_config = Swagger.DEFAULT_CONFIG
-    swagger_config["favicon"] = ""
-
-    Swagger(
-        app,
-        template=build_swagger_template(settings),
-        config=swagger_config
-    )
-    register_blueprints(app)
-    return app
-
-
-app = create_app()
+        globals()["app"] = instance = create_app()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
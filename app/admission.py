@@ -0,0 +1,180 @@
+"""Adaptive admission control per route class.
+
+Routes are grouped into classes: ``cognito`` for handlers that call Cognito
+and ``local`` for ones answered in process (token verification, job
+status). ``/metrics`` and the Swagger UI are never shed. Each class has a concurrency limit that adapts to the latency its
+requests observe; a request arriving while its class is at the limit is
+shed with ``503`` and ``Retry-After`` before it can tie up a worker. When
+Cognito slows down the ``cognito`` limit shrinks, so worker threads stay
+free for ``/me`` and ``/auth/check``.
+
+Limits follow a gradient rule (as in Netflix's concurrency-limits
+``Gradient2``): the ratio of long-term to recent latency scales the limit
+down when requests get slower than usual, and a ``sqrt(limit)`` headroom
+term lets it grow back while latency is steady. The ``cognito`` limit never
+exceeds the botocore connection pool: requests beyond it would only queue
+for a connection.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import Flask, g, jsonify, request
+
+from .config import settings
+from .metrics import registry
+
+
+# Flask endpoint -> route class; endpoints not listed are not limited
+ROUTE_CLASSES = {
+    "registration.signup": "cognito",
+    "registration.confirm_signup": "cognito",
+    "session.login": "cognito",
+    "session.refresh_tokens": "cognito",
+    "password.forgot_password": "cognito",
+    "password.reset_password": "cognito",
+    "profile.get_profile": "cognito",
+    "profile.update_profile": "cognito",
+    "social.google_callback": "cognito",
+    "social.provider_callback": "cognito",
+    "session.me": "local",
+    "session.logout": "local",
+    "gateway.check": "local",
+    "jobs.job_status": "local",
+    "social.google_start": "local",
+    "social.provider_start": "local",
+}
+
+
+class GradientLimit:
+    """Concurrency limit adjusted from the long-term vs. recent latency ratio."""
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._long_alpha = 2.0 / (long_window + 1)
+        self.long_rtt: Optional[float] = None
+        self.short_rtt: Optional[float] = None
+
+    def update(self, rtt: float, inflight: int, failed: bool) -> float:
+        if failed:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            return self.limit
+
+        self.short_rtt = rtt if self.short_rtt is None else self.short_rtt * 0.5 + rtt * 0.5
+        if self.long_rtt is None:
+            self.long_rtt = rtt
+        else:
+            self.long_rtt += (rtt - self.long_rtt) * self._long_alpha
+            if self.long_rtt > 2 * self.short_rtt:
+                self.long_rtt *= 0.95  # recover quickly once a slow spell ends
+
+        if inflight < self.limit / 2:
+            return self.limit  # not using the limit, so latency says nothing about it
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+        return self.limit
+
+
+class Gate:
+    """In-flight counter for one route class in front of a ``GradientLimit``."""
+
+    def __init__(self, name: str, limit: GradientLimit):
+        self.name = name
+        self.limiter = limit
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+        self._admitted = registry.counter(f"admission.{name}.admitted")
+        self._shed = registry.counter(f"admission.{name}.shed")
+        self._rtt = registry.timing(f"admission.{name}.rtt_ms")
+        registry.gauge(f"admission.{name}.limit", lambda: round(self.limiter.limit, 2))
+        registry.gauge(f"admission.{name}.inflight", lambda: self.inflight)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.inflight >= int(self.limiter.limit):
+                admitted = False
+            else:
+                self.inflight += 1
+                admitted = True
+        (self._admitted if admitted else self._shed).inc()
+        return admitted
+
+    def release(self, rtt_ms: float, failed: bool) -> None:
+        with self._lock:
+            inflight = self.inflight
+            self.inflight -= 1
+            self.limiter.update(rtt_ms, inflight, failed)
+        self._rtt.observe(rtt_ms)
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: about one recent request time."""
+
+        recent = self.limiter.short_rtt or 1000.0
+        return max(1, min(30, math.ceil(recent / 1000)))
+
+
+def build_gates() -> Dict[str, Gate]:
+    pool = settings.cognito_max_pool_connections
+    cognito_max = settings.admission_cognito_max or pool
+    local_max = settings.admission_local_max or pool * 4
+    return {
+        "cognito": Gate("cognito", GradientLimit(initial=cognito_max, min_limit=1, max_limit=cognito_max)),
+        "local": Gate("local", GradientLimit(initial=local_max, min_limit=4, max_limit=local_max)),
+    }
+
+
+def init_admission(app: Flask, gates: Optional[Dict[str, Gate]] = None) -> None:
+    """Install admission control on ``app`` if ``ADMISSION_CONTROL`` is on."""
+
+    if gates is None:
+        if not settings.admission_control:
+            return
+        gates = build_gates()
+
+    @app.before_request
+    def admit():
+        gate = gates.get(ROUTE_CLASSES.get(request.endpoint))
+        if gate is None:
+            return None
+        if not gate.try_acquire():
+            response = jsonify({"error": "Service is overloaded; retry later"})
+            response.status_code = 503
+            response.headers["Retry-After"] = str(gate.retry_after())
+            return response
+        g.admission = (gate, time.perf_counter())
+        return None
+
+    @app.after_request
+    def note_status(response):
+        if "admission" in g:
+            g.admission_failed = response.status_code >= 500 or response.status_code == 429
+        return response
+
+    @app.teardown_request
+    def release(exc):
+        admission = g.pop("admission", None)
+        if admission is None:
+            return
+        gate, started = admission
+        failed = exc is not None or g.pop("admission_failed", False)
+        gate.release((time.perf_counter() - started) * 1000, failed)
@@ -0,0 +1,273 @@
+"""Structured auth-event log written off the request thread.
+
+With ``AUTH_EVENT_SINK`` set, login, refresh, logout, signup, confirmation,
+password recovery, social callbacks and rejected tokens each produce one JSON
+record: route, outcome class, status, the Cognito operation behind it and
+latencies. Request threads only append the record to a bounded in-memory
+buffer; a background thread drains it in batches of ``AUTH_EVENT_BATCH``
+every ``AUTH_EVENT_FLUSH_INTERVAL`` seconds (sooner once a batch is waiting)
+and hands each batch to the sink. When the buffer is full new records are
+dropped and counted in ``/metrics`` rather than making the request wait;
+a batch the sink fails to write is logged and counted as dropped too.
+
+Sinks are ``stdout``, ``stderr``, ``file:<path>`` or ``module:callable``
+naming any function that takes a list of records. On Lambda the flush
+thread is frozen between invocations, so records from one invocation are
+written early in the next.
+"""
+
+from __future__ import annotations
+
+import atexit
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask, g, request
+
+from .config import settings
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+Sink = Callable[[List[Record]], None]
+
+# Flask endpoint -> event name
+EVENTS = {
+    "registration.signup": "signup",
+    "registration.confirm_signup": "signup_confirm",
+    "session.login": "login",
+    "session.refresh_tokens": "refresh",
+    "session.logout": "logout",
+    "password.forgot_password": "password_forgot",
+    "password.reset_password": "password_reset",
+    "social.google_callback": "social_login",
+    "social.provider_callback": "social_login",
+}
+
+# Cognito calls made while the current request runs, or None when it is not logged
+_calls: ContextVar[Optional[List[tuple]]] = ContextVar("auth_event_calls", default=None)
+
+
+def stream_sink(stream) -> Sink:
+    def sink(batch: List[Record]) -> None:
+        stream.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch))
+        stream.flush()
+
+    return sink
+
+
+def file_sink(path: str) -> Sink:
+    def sink(batch: List[Record]) -> None:
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch))
+
+    return sink
+
+
+def build_sink(spec: str) -> Optional[Sink]:
+    if not spec:
+        return None
+    if spec == "stdout":
+        return stream_sink(sys.stdout)
+    if spec == "stderr":
+        return stream_sink(sys.stderr)
+    if spec.startswith("file:"):
+        return file_sink(spec[len("file:"):])
+    module_name, sep, attr = spec.partition(":")
+    if sep and module_name and attr:
+        return getattr(importlib.import_module(module_name), attr)
+    raise RuntimeError(f"Unknown AUTH_EVENT_SINK {spec!r}; expected stdout, stderr, file:<path> or module:callable")
+
+
+class EventLog:
+    """Bounded buffer drained by a background thread."""
+
+    def __init__(self, sink: Sink, capacity: int, batch_size: int, flush_interval: float):
+        self.sink = sink
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._emitted = registry.counter("auth_events.emitted")
+        self._dropped = registry.counter("auth_events.dropped")
+        self._written = registry.counter("auth_events.written")
+        self._sink_errors = registry.counter("auth_events.sink_errors")
+        registry.gauge("auth_events.buffered", lambda: len(self._buffer))
+
+    def emit(self, record: Record) -> bool:
+        """Queue ``record`` for writing; False if the buffer was full."""
+
+        if self._pid != os.getpid():
+            self._start()  # first use, or first use in a forked worker
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                self._dropped.inc()
+                return False
+            self._buffer.append(record)
+            pending = len(self._buffer)
+        self._emitted.inc()
+        if pending >= self.batch_size:
+            self._ready.set()
+        return True
+
+    def flush(self) -> None:
+        """Write everything buffered so far, one batch at a time."""
+
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._buffer:
+                        return
+                    count = min(self.batch_size, len(self._buffer))
+                    batch = [self._buffer.popleft() for _ in range(count)]
+                try:
+                    self.sink(batch)
+                    self._written.inc(len(batch))
+                except Exception as exc:  # a broken sink loses the batch, not the process
+                    self._sink_errors.inc()
+                    self._dropped.inc(len(batch))
+                    logger.warning("Could not write %d auth events: %s", len(batch), exc)
+
+    def close(self) -> None:
+        """Stop the background thread and write what is buffered; a later ``emit`` starts a new thread."""
+
+        with self._lock:
+            thread, self._thread, self._pid = self._thread, None, None
+            ready = self._ready
+        if thread is not None and thread.is_alive():
+            ready.set()
+            thread.join()
+        self.flush()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._ready = threading.Event()
+            self._flush_lock = threading.Lock()
+            self._thread = thread = threading.Thread(target=self._run, name="auth-events", daemon=True)
+        thread.start()
+
+    def _run(self) -> None:
+        ready = self._ready
+        while self._thread is threading.current_thread():
+            ready.wait(self.flush_interval)
+            ready.clear()
+            self.flush()
+
+
+def build_log() -> Optional[EventLog]:
+    sink = build_sink(settings.auth_event_sink)
+    if sink is None:
+        return None
+    return EventLog(sink, settings.auth_event_buffer, settings.auth_event_batch, settings.auth_event_flush_interval)
+
+
+log = build_log()
+if log:
+    atexit.register(log.flush)
+
+
+def outcome_class(status: int) -> str:
+    if status < 400:
+        return "success"
+    if status in (401, 403):
+        return "auth_failure"
+    if status == 429:
+        return "throttled"
+    if status < 500:
+        return "client_error"
+    return "server_error"
+
+
+def mark(event: str, **fields: Any) -> None:
+    """Log the current request as ``event`` even if its endpoint is not in ``EVENTS``."""
+
+    g.auth_event = (event, fields)
+
+
+def _before_parameter_build(context, **kwargs):
+    if _calls.get() is not None:
+        context["auth_event_start"] = time.perf_counter()
+
+
+def _after_call(model, http_response, context, **kwargs):
+    calls = _calls.get()
+    if calls is None or "auth_event_start" not in context:
+        return
+    calls.append((model.name, (time.perf_counter() - context["auth_event_start"]) * 1000))
+
+
+def instrument_client(client) -> None:
+    """Attribute calls made through a boto3 ``client`` to the logged request."""
+
+    # before-call handlers can be skipped when another handler answers the
+    # call (stubs, caches), so time from parameter building instead
+    events = client.meta.events
+    events.register("before-parameter-build.*.*", _before_parameter_build, unique_id="auth-events-before")
+    events.register("after-call.*.*", _after_call, unique_id="auth-events-after")
+
+
+def init_auth_events(app: Flask, event_log: Optional[EventLog] = None) -> None:
+    """Install the logging hooks on ``app`` if a sink is configured."""
+
+    event_log = event_log or log
+    if event_log is None:
+        return
+
+    from .cognito import cognito
+
+    instrument_client(cognito)
+
+    @app.before_request
+    def start_auth_event():
+        g.auth_event_started = time.perf_counter()
+        if request.endpoint in EVENTS:
+            g.auth_event_calls = _calls.set([])
+
+    @app.after_request
+    def record_auth_event(response):
+        marked = g.pop("auth_event", None)
+        event, fields = marked if marked else (EVENTS.get(request.endpoint), {})
+        token = g.pop("auth_event_calls", None)
+        calls = _calls.get() if token is not None else None
+        if token is not None:
+            _calls.reset(token)
+        if event is None:
+            return response
+
+        started = g.get("auth_event_started")
+        claims = getattr(request, "claims", None) or {}
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "event": event,
+            "outcome": outcome_class(response.status_code),
+            "status": response.status_code,
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule else request.path,
+            "operation": calls[-1][0] if calls else None,
+            "cognito_ms": round(sum(ms for _, ms in calls), 3) if calls else None,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3) if started else None,
+            "sub": claims.get("sub"),
+        }
+        record.update(fields)
+        event_log.emit(record)
+        return response
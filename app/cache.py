@@ -0,0 +1,89 @@
+"""Small in-process caches shared by the routes."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            deadline, value = entry
+            if deadline < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        deadline = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (deadline, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class LocalKeyValue:
+    """In-process stand-in for the subset of the redis-py API used here."""
+
+    def __init__(self):
+        self._data: Dict[str, tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.time():
+                self._data.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ex: int, nx: bool = False) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            if nx and entry is not None and entry[0] >= time.time():
+                return False
+            self._data[key] = (time.time() + ex, value)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def shared_backend(url: Optional[str], setting: str):
+    """A redis-py client for ``url``, or ``LocalKeyValue`` when it is unset."""
+
+    if not url:
+        return LocalKeyValue()
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError(f"{setting} requires the 'redis' package") from exc
+    return redis.Redis.from_url(url)
@@ -5,46 +5,92 @@ from __future__ import annotations
 import base64
 import hashlib
 import hmac
-import json
+import time
 from typing import Any, Dict
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
 import requests
-import jwt
-from jwt.algorithms import RSAAlgorithm
 
 from .config import settings
+from .tokens import ISSUER, JWKS_URL, KeyStore, key_store, verify_jwt  # noqa: F401
 
 
-cognito = boto3.client("cognito-idp", region_name=settings.cognito_region)
+cognito = boto3.client(
+    "cognito-idp",
+    region_name=settings.cognito_region,
+    config=Config(max_pool_connections=settings.cognito_max_pool_connections),
+)
 
-_jwks_cache: Dict[str, Any] | None = None
-ISSUER = f"https://cognito-idp.{settings.cognito_region}.amazonaws.com/{settings.user_pool_id}"
-JWKS_URL = f"{ISSUER}/.well-known/jwks.json"
+OIDC_CONFIG_URL = f"{ISSUER}/.well-known/openid-configuration"
+
+_oidc_config: Dict[str, Any] | None = None
+_oidc_fallback: Dict[str, Any] | None = None
+_oidc_failed_at = 0.0
+
+# Seconds before a failed discovery is tried again
+OIDC_RETRY_AFTER = 60.0
+
+# Error codes that mean "try again later" rather than "this request is wrong"
+THROTTLING_ERRORS = {
+    "TooManyRequestsException",
+    "LimitExceededException",
+    "ThrottlingException",
+    "TooManyFailedAttemptsException",
+}
 
 
 def get_jwks() -> Dict[str, Any]:
-    global _jwks_cache
-    if _jwks_cache is None:
-        _jwks_cache = requests.get(JWKS_URL, timeout=10).json()
-    return _jwks_cache
-
-
-def verify_jwt(token: str) -> Dict[str, Any]:
-    """Verify an ID or access token from this user pool."""
-
-    jwks = get_jwks()
-    headers = jwt.get_unverified_header(token)
-    kid = headers["kid"]
-    key = next(k for k in jwks["keys"] if k["kid"] == kid)
-    public_key = RSAAlgorithm.from_jwk(json.dumps(key))
-
-    return jwt.decode(
-        token,
-        public_key,
-        algorithms=["RS256"],
-        audience=settings.client_id,
-        issuer=ISSUER,
+    return key_store.jwks()
+
+
+def get_oidc_config() -> Dict[str, Any]:
+    """OpenID discovery document for the pool, fetched once.
+
+    If discovery is unreachable the hosted UI's standard paths under
+    ``COGNITO_DOMAIN`` are used instead, which is what the endpoints used to
+    be hardcoded to. Only a successful discovery is kept; after a failure it
+    is tried again once ``OIDC_RETRY_AFTER`` seconds have passed.
+    """
+
+    global _oidc_config, _oidc_fallback, _oidc_failed_at
+    if _oidc_config is not None:
+        return _oidc_config
+    if _oidc_fallback is not None and time.monotonic() - _oidc_failed_at < OIDC_RETRY_AFTER:
+        return _oidc_fallback
+    try:
+        resp = requests.get(OIDC_CONFIG_URL, timeout=10)
+        config = resp.json() if resp.ok else None
+    except (requests.RequestException, ValueError):
+        config = None
+    if isinstance(config, dict):
+        config.setdefault("authorization_endpoint", f"{settings.cognito_domain}/oauth2/authorize")
+        config.setdefault("token_endpoint", f"{settings.cognito_domain}/oauth2/token")
+        _oidc_config, _oidc_fallback = config, None
+        return config
+    _oidc_fallback = {
+        "authorization_endpoint": f"{settings.cognito_domain}/oauth2/authorize",
+        "token_endpoint": f"{settings.cognito_domain}/oauth2/token",
+    }
+    _oidc_failed_at = time.monotonic()
+    return _oidc_fallback
+
+
+def exchange_code(code: str, redirect_uri: str) -> requests.Response:
+    """Trade a hosted UI authorization code for tokens."""
+
+    return requests.post(
+        get_oidc_config()["token_endpoint"],
+        data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "client_id": settings.client_id,
+            "client_secret": settings.client_secret,
+            "redirect_uri": redirect_uri,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=10,
     )
 
 
@@ -56,3 +102,22 @@ def get_secret_hash(username: str) -> str:
     key = settings.client_secret.encode("utf-8")
     digest = hmac.new(key, msg, hashlib.sha256).digest()
     return base64.b64encode(digest).decode("utf-8")
+
+
+def error_status(exc: Exception) -> int:
+    """HTTP status for a failed Cognito call.
+
+    429 when Cognito throttled it and 503 when Cognito failed or could not
+    be reached, so clients (and ``Idempotency-Key`` replays) retry those;
+    400 for everything else.
+    """
+
+    if isinstance(exc, ClientError):
+        if exc.response.get("Error", {}).get("Code") in THROTTLING_ERRORS:
+            return 429
+        if exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 400) >= 500:
+            return 503
+        return 400
+    if isinstance(exc, (BotoConnectionError, HTTPClientError)):
+        return 503
+    return 400
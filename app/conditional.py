@@ -0,0 +1,39 @@
+"""ETag helpers for conditional GETs on per-user resources."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from flask import Response, jsonify, request
+
+
+def etag_for(payload: Any) -> str:
+    """Strong ETag for a JSON-serialisable payload (key order independent)."""
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def _private(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    # Per-user data: never in shared caches, and clients revalidate each time
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.update(("Authorization", "Cookie"))
+    return response
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """A bodiless 304 if the client's ``If-None-Match`` already has ``etag``."""
+
+    if etag and request.if_none_match.contains_weak(etag):
+        return _private(Response(status=304), etag)
+    return None
+
+
+def conditional_json(payload: Any, etag: Optional[str] = None) -> Response:
+    """``jsonify(payload)``, or 304 when the client's copy is current."""
+
+    etag = etag or etag_for(payload)
+    return not_modified(etag) or _private(jsonify(payload), etag)
@@ -17,6 +17,96 @@ class Settings:
     client_id: str = os.getenv("CLIENT_ID")
     client_secret: str = os.getenv("CLIENT_SECRET")
     cognito_domain: str = os.getenv("COGNITO_DOMAIN")
+    # botocore connection pool per process; also sizes the container server's concurrency
+    cognito_max_pool_connections: int = int(os.getenv("COGNITO_MAX_POOL_CONNECTIONS") or 10)
+    # Comma separated Cognito identity provider names offered by /auth/<provider>/start
+    social_providers: str = os.getenv("SOCIAL_PROVIDERS", "Google")
+
+    # Server-side sessions (off unless SESSION_STORE is memory, sqlite or shared)
+    session_store: str = os.getenv("SESSION_STORE", "")
+    session_cookie: str = os.getenv("SESSION_COOKIE", "sid")
+    session_ttl: int = int(os.getenv("SESSION_TTL") or 86400)
+    session_refresh_margin: int = int(os.getenv("SESSION_REFRESH_MARGIN") or 300)
+    session_max_entries: int = int(os.getenv("SESSION_MAX_ENTRIES") or 10000)
+    session_sqlite_path: str = os.getenv("SESSION_SQLITE_PATH", "/tmp/sessions.db")
+    session_shared_url: str = os.getenv("SESSION_SHARED_URL")
+
+    # Queue signup/forgot-password Cognito calls and answer 202 (memory or sqlite)
+    async_dispatch: str = os.getenv("ASYNC_DISPATCH", "")
+    job_workers: int = int(os.getenv("JOB_WORKERS") or 4)
+    job_ttl: int = int(os.getenv("JOB_TTL") or 3600)
+    job_queue_path: str = os.getenv("JOB_QUEUE_PATH", "/tmp/jobs.db")
+
+    # Idempotency-Key replay store for signup, confirm and forgot-password
+    idempotency_store: str = os.getenv("IDEMPOTENCY_STORE", "memory")
+    idempotency_shared_url: str = os.getenv("IDEMPOTENCY_SHARED_URL")
+    idempotency_ttl: int = int(os.getenv("IDEMPOTENCY_TTL") or 86400)
+    idempotency_wait: float = float(os.getenv("IDEMPOTENCY_WAIT") or 10)
+    idempotency_max_entries: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES") or 10000)
+
+    # Seconds a user's attributes may answer GET /profile without GetUser
+    profile_cache_ttl: int = int(os.getenv("PROFILE_CACHE_TTL") or 30)
+    # Extra parts GET /profile fetches concurrently by default (e.g. "groups,devices")
+    profile_parts: str = os.getenv("PROFILE_PARTS", "")
+    profile_deadline: float = float(os.getenv("PROFILE_DEADLINE") or 3.0)
+    profile_groups_ttl: int = int(os.getenv("PROFILE_GROUPS_TTL") or 300)
+    profile_devices_ttl: int = int(os.getenv("PROFILE_DEVICES_TTL") or 60)
+
+    # Seconds between DescribeUserPool reads of the password policy
+    password_policy_ttl: int = int(os.getenv("PASSWORD_POLICY_TTL") or 3600)
+    # Directory for warm state that should survive restarts (Lambda keeps /tmp while warm)
+    warm_state_dir: str = os.getenv("WARM_STATE_DIR", "/tmp/cognito-auth-kit")
+
+    # Verified-token cache in front of signature checks (entries never outlive the token)
+    token_cache_ttl: int = int(os.getenv("TOKEN_CACHE_TTL") or 300)
+    token_cache_max_entries: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES") or 10000)
+    # mmap file shared by the workers on a host for JWKS, verified tokens and gateway decisions
+    shared_cache: str = os.getenv("SHARED_CACHE", "")
+    shared_cache_slots: int = int(os.getenv("SHARED_CACHE_SLOTS") or 8192)
+    shared_cache_slot_size: int = int(os.getenv("SHARED_CACHE_SLOT_SIZE") or 2048)
+
+    # GET /auth/check decision cache and the claims projected into response headers
+    gateway_cache_ttl: int = int(os.getenv("GATEWAY_CACHE_TTL") or 300)
+    gateway_deny_ttl: int = int(os.getenv("GATEWAY_DENY_TTL") or 10)
+    gateway_cache_max_entries: int = int(os.getenv("GATEWAY_CACHE_MAX_ENTRIES") or 100000)
+    gateway_deny_max_entries: int = int(os.getenv("GATEWAY_DENY_MAX_ENTRIES") or 1000)
+    gateway_claim_headers: str = os.getenv(
+        "GATEWAY_CLAIM_HEADERS", "X-User-Sub=sub,X-User-Groups=cognito:groups,X-User-Email=email"
+    )
+
+    # authorizer.lambda_handler: "policy" (IAM document) or "simple" (HTTP API simple responses)
+    authorizer_response: str = os.getenv("AUTHORIZER_RESPONSE", "policy")
+    authorizer_policy_ttl: int = int(os.getenv("AUTHORIZER_POLICY_TTL") or 300)
+
+    # POST /batch: steps per request and sub-requests run at once across all batches
+    batch_max_steps: int = int(os.getenv("BATCH_MAX_STEPS") or 10)
+    batch_workers: int = int(os.getenv("BATCH_WORKERS") or 0)  # 0: the botocore pool size
+
+    # Adaptive per-route-class concurrency limits with 503 shedding (off unless ADMISSION_CONTROL=1)
+    admission_control: bool = os.getenv("ADMISSION_CONTROL", "").lower() in ("1", "true", "yes")
+    admission_cognito_max: int = int(os.getenv("ADMISSION_COGNITO_MAX") or 0)  # 0: the botocore pool size
+    admission_local_max: int = int(os.getenv("ADMISSION_LOCAL_MAX") or 0)  # 0: four times the pool size
+
+    # Long-running container server (server.py); 0 means size automatically
+    server_bind: str = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+    server_worker_class: str = os.getenv("SERVER_WORKER_CLASS", "gthread")
+    server_workers: int = int(os.getenv("SERVER_WORKERS") or 0)
+    server_threads: int = int(os.getenv("SERVER_THREADS") or 0)
+    server_worker_connections: int = int(os.getenv("SERVER_WORKER_CONNECTIONS") or 0)
+    server_timeout: int = int(os.getenv("SERVER_TIMEOUT") or 30)
+    server_graceful_timeout: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT") or 20)
+
+    # Structured auth-event log: stdout, stderr, file:<path> or module:callable (off when empty)
+    auth_event_sink: str = os.getenv("AUTH_EVENT_SINK", "")
+    auth_event_buffer: int = int(os.getenv("AUTH_EVENT_BUFFER") or 10000)
+    auth_event_batch: int = int(os.getenv("AUTH_EVENT_BATCH") or 256)
+    auth_event_flush_interval: float = float(os.getenv("AUTH_EVENT_FLUSH_INTERVAL") or 1.0)
+
+    # Per-request CPU profiling (off unless a rate or a signing secret is set)
+    profile_sample_rate: float = float(os.getenv("PROFILE_SAMPLE_RATE") or 0)
+    profile_secret: str = os.getenv("PROFILE_SECRET")
+    profile_dir: str = os.getenv("PROFILE_DIR", "/tmp")
+    profile_max_files: int = int(os.getenv("PROFILE_MAX_FILES") or 200)
 
 
 settings = Settings()
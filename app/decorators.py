@@ -3,22 +3,42 @@
 from functools import wraps
 from flask import jsonify, request
 
+from . import auth_events, sessions
 from .cognito import verify_jwt
 
 
 def require_bearer_token(fn):
-    """Verify Bearer token and store token + claims on the request."""
+    """Verify Bearer token and store token + claims on the request.
+
+    In session mode a session cookie is accepted instead; it resolves to the
+    access token and the claims verified when the session was created.
+    """
 
     @wraps(fn)
     def wrapper(*args, **kwargs):
         auth = request.headers.get("Authorization", "")
         if not auth.startswith("Bearer "):
-            return jsonify({"error": "Missing Bearer token"}), 401
+            session_id = sessions.current_session_id() if sessions.manager else None
+            if not session_id:
+                auth_events.mark("token_rejected", reason="missing")
+                return jsonify({"error": "Missing Bearer token"}), 401
+            try:
+                record = sessions.manager.resolve(session_id)
+            except Exception as exc:  # Cognito unavailable while refreshing; the session may still be good
+                return sessions.refresh_failed(exc)
+            if record is None:
+                auth_events.mark("token_rejected", reason="invalid_session")
+                return jsonify({"error": "Invalid session"}), 401
+
+            request.token = record["access_token"]
+            request.claims = record["claims"]
+            return fn(*args, **kwargs)
 
         token = auth.split(" ", 1)[1]
         try:
             claims = verify_jwt(token)
         except Exception as exc:  # passthrough error message for debugging
+            auth_events.mark("token_rejected", reason=type(exc).__name__)
             return jsonify({"error": f"Invalid token: {exc}"}), 401
 
         request.token = token
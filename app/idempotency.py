@@ -0,0 +1,187 @@
+"""``Idempotency-Key`` support for endpoints that trigger Cognito side effects.
+
+The first request with a given key runs normally and its response is stored
+for ``IDEMPOTENCY_TTL`` seconds. Retries with the same key and body are
+answered from the store without touching Cognito; a retry that arrives
+while the original is still running waits for it (up to
+``IDEMPOTENCY_WAIT`` seconds). Reusing a key with a different body is a 422.
+
+Responses with a 5xx or 429 status are not stored, so those retries run
+again; handlers answer Cognito throttling and connection failures with
+those statuses (``cognito.error_status``). Bodies are compared through an
+HMAC keyed with ``FLASK_SECRET_KEY``: they contain passwords, and a plain
+hash in a shared store could be brute-forced offline.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from flask import Response, current_app, jsonify, request
+
+from .cache import TTLCache, shared_backend
+from .config import settings
+
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# How long a claim on a key lasts if its request never finishes
+PENDING_TTL = 60
+
+Entry = Dict[str, Any]
+
+
+class MemoryIdempotencyStore:
+    """Bounded in-process store."""
+
+    def __init__(self, max_entries: int):
+        self._cache = TTLCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        return self._cache.get(key)
+
+    def add(self, key: str, entry: Entry, ttl: int) -> bool:
+        with self._lock:
+            if self._cache.get(key) is not None:
+                return False
+            self._cache.set(key, entry, ttl)
+            return True
+
+    def set(self, key: str, entry: Entry, ttl: int) -> None:
+        self._cache.set(key, entry, ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+
+class SharedIdempotencyStore:
+    """Store on a shared key/value service so replays work across workers.
+
+    ``backend`` needs redis-py style ``get``, ``set(key, value, ex=, nx=)``
+    and ``delete``.
+    """
+
+    prefix = "idempotency:"
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key: str) -> Optional[Entry]:
+        raw = self.backend.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def add(self, key: str, entry: Entry, ttl: int) -> bool:
+        return bool(self.backend.set(self.prefix + key, json.dumps(entry), ex=ttl, nx=True))
+
+    def set(self, key: str, entry: Entry, ttl: int) -> None:
+        self.backend.set(self.prefix + key, json.dumps(entry), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(self.prefix + key)
+
+
+def build_store(kind: str):
+    if kind == "memory":
+        return MemoryIdempotencyStore(settings.idempotency_max_entries)
+    if kind == "shared":
+        if not settings.flask_secret_key:
+            raise RuntimeError("IDEMPOTENCY_STORE=shared requires FLASK_SECRET_KEY to key request fingerprints")
+        return SharedIdempotencyStore(shared_backend(settings.idempotency_shared_url, "IDEMPOTENCY_SHARED_URL"))
+    raise RuntimeError(f"Unknown IDEMPOTENCY_STORE {kind!r}; expected memory or shared")
+
+
+store = build_store(settings.idempotency_store)
+
+# Requests running in this process, so local duplicates can wait on an event
+# instead of polling the store
+_in_flight: Dict[str, threading.Event] = {}
+_in_flight_lock = threading.Lock()
+
+
+def _fingerprint(body: bytes) -> str:
+    key = (settings.flask_secret_key or "").encode("utf-8")
+    return hmac.new(key, body, hashlib.sha256).hexdigest()
+
+
+def _replay(entry: Entry) -> Response:
+    response = Response(entry["body"], status=entry["status"], content_type=entry["content_type"])
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _wait_for(key: str, fingerprint: str):
+    """Replay the stored response for ``key``, waiting while its original runs."""
+
+    deadline = time.monotonic() + settings.idempotency_wait
+    while True:
+        entry = store.get(key)
+        if entry is None:
+            return None  # original failed or expired; caller may run the request
+        if entry["fingerprint"] != fingerprint:
+            return jsonify({"error": f"{HEADER} was already used with a different request body"}), 422
+        if entry["state"] == "done":
+            return _replay(entry)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return jsonify({"error": f"A request with this {HEADER} is still in progress"}), 409
+        with _in_flight_lock:
+            event = _in_flight.get(key)
+        if event is not None:
+            event.wait(remaining)
+        else:
+            time.sleep(min(0.05, remaining))  # original runs in another worker
+
+
+def idempotent(fn):
+    """Honour ``Idempotency-Key`` on a view; without the header it runs as usual."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        raw_key = request.headers.get(HEADER)
+        if not raw_key:
+            return fn(*args, **kwargs)
+        if len(raw_key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        key = f"{request.endpoint}:{raw_key}"
+        fingerprint = _fingerprint(request.get_data())
+
+        while not store.add(key, {"state": "pending", "fingerprint": fingerprint}, PENDING_TTL):
+            answer = _wait_for(key, fingerprint)
+            if answer is not None:
+                return answer
+
+        event = threading.Event()
+        with _in_flight_lock:
+            _in_flight[key] = event
+        stored = False
+        try:
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code < 500 and response.status_code != 429:
+                store.set(key, {
+                    "state": "done",
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "content_type": response.content_type,
+                    "body": response.get_data(as_text=True),
+                }, settings.idempotency_ttl)
+                stored = True
+            return response
+        finally:
+            if not stored:
+                store.delete(key)
+            with _in_flight_lock:
+                _in_flight.pop(key, None)
+            event.set()
+
+    return wrapper
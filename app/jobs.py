@@ -0,0 +1,333 @@
+"""Background dispatch for endpoints whose Cognito call only triggers delivery.
+
+With ``ASYNC_DISPATCH`` set, ``/auth/signup`` and ``/auth/forgot-password``
+validate the input, enqueue the Cognito call and answer ``202`` with a job
+ID straight away; ``GET /auth/jobs/<id>`` reports the outcome. Workers are
+threads in the same process, so this suits long-running servers rather
+than Lambda, which freezes the process between invocations.
+
+``memory`` keeps the queue in process. ``sqlite`` keeps it in a local file
+so queued jobs survive a restart; parameters (which include passwords) are
+encrypted with a key derived from ``FLASK_SECRET_KEY`` and dropped once the
+job has run.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import secrets
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet
+from flask import jsonify, url_for
+
+from .cache import TTLCache
+from .config import settings
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+Job = Dict[str, Any]
+Handler = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], int]]
+
+# operation name -> callable(params) -> (body, status)
+handlers: Dict[str, Handler] = {}
+
+# Seconds a worker waits after a backend error, doubling up to the maximum
+ERROR_BACKOFF = 0.5
+MAX_ERROR_BACKOFF = 30.0
+# Seconds between sweeps for jobs left 'running' by a worker that died
+STALE_SWEEP_INTERVAL = 60.0
+
+
+def handler(operation: str):
+    """Register the function that runs ``operation`` jobs."""
+
+    def decorator(fn: Handler) -> Handler:
+        handlers[operation] = fn
+        return fn
+
+    return decorator
+
+
+class MemoryJobBackend:
+    def __init__(self, ttl: int):
+        self._queue: deque = deque()
+        self._jobs = TTLCache(max_entries=100000, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def push(self, job: Job) -> None:
+        with self._lock:
+            self._jobs.set(job["id"], job, float("inf"))  # JOB_TTL starts once it finishes
+            self._queue.append(job)
+
+    def claim(self) -> Optional[Job]:
+        with self._lock:
+            if not self._queue:
+                return None
+            job = self._queue.popleft()
+        job.update(state="running", started=time.time())
+        return job
+
+    def finish(self, job: Job, state: str, status: int, result: Dict[str, Any]) -> None:
+        job.update(state=state, status=status, result=result, finished=time.time(), params=None)
+        self._jobs.set(job["id"], job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def requeue_stale(self) -> int:
+        return 0  # jobs live and die with this process, so none are orphaned
+
+    def depth(self) -> int:
+        return len(self._queue)
+
+
+class SQLiteJobBackend:
+    """Jobs in a local SQLite file, which the workers on one host may share.
+
+    A job still ``running`` after ``stale_after`` seconds belonged to a
+    worker that died; ``requeue_stale`` puts it back, and the job's handler
+    is told it is a retry (``params["retried"]``), since the first attempt
+    may already have reached Cognito.
+    """
+
+    stale_after = 300
+
+    def __init__(self, path: str, ttl: int, secret: str):
+        self.path = path
+        self.ttl = ttl
+        self._fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest()))
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, operation TEXT NOT NULL, params BLOB, state TEXT NOT NULL, "
+            "status INTEGER, result TEXT, created REAL NOT NULL, started REAL, finished REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_state_created ON jobs (state, created)")
+        if "attempts" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self.requeue_stale()
+
+    def requeue_stale(self) -> int:
+        """Queue again the jobs whose worker died mid-run; returns how many."""
+
+        return self._connect().execute(
+            "UPDATE jobs SET state = 'queued', started = NULL WHERE state = 'running' AND started < ?",
+            (time.time() - self.stale_after,),
+        ).rowcount
+
+    def after_fork(self) -> None:
+        """Drop connections inherited from the parent; SQLite handles must not cross ``fork``."""
+
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def push(self, job: Job) -> None:
+        params = self._fernet.encrypt(json.dumps(job["params"]).encode("utf-8"))
+        self._connect().execute(
+            "INSERT INTO jobs (id, operation, params, state, created) VALUES (?, ?, ?, 'queued', ?)",
+            (job["id"], job["operation"], params, job["created"]),
+        )
+
+    def claim(self) -> Optional[Job]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, operation, params, created, attempts FROM jobs WHERE state = 'queued' "
+                "ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            started = time.time()
+            conn.execute(
+                "UPDATE jobs SET state = 'running', started = ?, attempts = attempts + 1 WHERE id = ?",
+                (started, row[0]),
+            )
+        finally:
+            conn.execute("COMMIT")
+        params = json.loads(self._fernet.decrypt(row[2]))
+        if row[4]:
+            params["retried"] = True
+        return {"id": row[0], "operation": row[1], "params": params, "created": row[3], "started": started}
+
+    def finish(self, job: Job, state: str, status: int, result: Dict[str, Any]) -> None:
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET state = ?, status = ?, result = ?, finished = ?, params = NULL WHERE id = ?",
+            (state, status, json.dumps(result), time.time(), job["id"]),
+        )
+        conn.execute("DELETE FROM jobs WHERE finished < ?", (time.time() - self.ttl,))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connect().execute(
+            "SELECT id, state, status, result FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "state": row[1], "status": row[2], "result": json.loads(row[3]) if row[3] else None}
+
+    def depth(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+
+class JobQueue:
+    def __init__(self, backend, workers: int):
+        self.backend = backend
+        self.workers = workers
+        self._wakeup = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._running = 0
+        self._running_lock = threading.Lock()
+        self._next_sweep = time.monotonic() + STALE_SWEEP_INTERVAL  # the backend swept on open
+        self._sweep_lock = threading.Lock()
+
+        self._queued_ms = registry.timing("jobs.queued_ms")
+        self._run_ms = registry.timing("jobs.run_ms")
+        self._succeeded = registry.counter("jobs.succeeded")
+        self._failed = registry.counter("jobs.failed")
+        self._errors = registry.counter("jobs.backend_errors")
+        registry.gauge("jobs.queue_depth", self.backend.depth)
+        registry.gauge("jobs.running", lambda: self._running)
+        registry.gauge("jobs.workers", lambda: self.workers)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+
+    def after_fork(self) -> None:
+        """Restart workers in a forked child; threads do not survive ``fork``."""
+
+        with self._start_lock:
+            was_started, self._started = self._started, False
+        self._wakeup = threading.Event()
+        if hasattr(self.backend, "after_fork"):
+            self.backend.after_fork()
+        if was_started:
+            self.start()
+
+    def submit(self, operation: str, params: Dict[str, Any]) -> str:
+        job = {
+            "id": secrets.token_urlsafe(16),
+            "operation": operation,
+            "params": params,
+            "state": "queued",
+            "created": time.time(),
+        }
+        self.backend.push(job)
+        self.start()
+        self._wakeup.set()
+        return job["id"]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.backend.get(job_id)
+
+    def _work(self) -> None:
+        backoff = 0.0
+        while True:
+            try:
+                self._sweep()
+                job = self.backend.claim()
+            except Exception as exc:  # e.g. "database is locked"; the thread must survive it
+                backoff = self._backend_error("claim a job", exc, backoff)
+                continue
+            backoff = 0.0
+            if job is None:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+
+            with self._running_lock:
+                self._running += 1
+            self._queued_ms.observe((job["started"] - job["created"]) * 1000)
+            started = time.perf_counter()
+            try:
+                body, status = handlers[job["operation"]](job["params"])
+            except Exception as exc:
+                body, status = {"error": str(exc)}, 500
+            finally:
+                with self._running_lock:
+                    self._running -= 1
+            self._run_ms.observe((time.perf_counter() - started) * 1000)
+
+            state = "succeeded" if status < 400 else "failed"
+            (self._succeeded if status < 400 else self._failed).inc()
+            while True:  # the Cognito call has run; keep its outcome until it is recorded
+                try:
+                    self.backend.finish(job, state, status, body)
+                    break
+                except Exception as exc:
+                    backoff = self._backend_error(f"record job {job['id']}", exc, backoff)
+            backoff = 0.0
+
+    def _sweep(self) -> None:
+        """Every ``STALE_SWEEP_INTERVAL`` one worker re-queues jobs a dead worker left running."""
+
+        now = time.monotonic()
+        with self._sweep_lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + STALE_SWEEP_INTERVAL
+        requeued = self.backend.requeue_stale()
+        if requeued:
+            logger.warning("Re-queued %d jobs left running by a worker that died", requeued)
+
+    def _backend_error(self, action: str, exc: Exception, backoff: float) -> float:
+        """Log ``exc``, sleep and return the next backoff."""
+
+        self._errors.inc()
+        backoff = min(MAX_ERROR_BACKOFF, backoff * 2 or ERROR_BACKOFF)
+        logger.warning("Job worker could not %s, retrying in %gs: %s", action, backoff, exc)
+        time.sleep(backoff)
+        return backoff
+
+
+def build_queue(kind: str) -> Optional[JobQueue]:
+    if not kind:
+        return None
+    if kind == "memory":
+        backend = MemoryJobBackend(settings.job_ttl)
+    elif kind == "sqlite":
+        if not settings.flask_secret_key:
+            raise RuntimeError("ASYNC_DISPATCH=sqlite requires FLASK_SECRET_KEY to encrypt queued parameters")
+        backend = SQLiteJobBackend(settings.job_queue_path, settings.job_ttl, settings.flask_secret_key)
+    else:
+        raise RuntimeError(f"Unknown ASYNC_DISPATCH {kind!r}; expected memory or sqlite")
+    return JobQueue(backend, settings.job_workers)
+
+
+queue = build_queue(settings.async_dispatch)
+
+
+def accepted(job_id: str):
+    """The 202 response for a newly queued job."""
+
+    response = jsonify({
+        "job_id": job_id,
+        "state": "queued",
+        "status_url": url_for("jobs.job_status", job_id=job_id),
+    })
+    response.headers["Location"] = url_for("jobs.job_status", job_id=job_id)
+    return response, 202
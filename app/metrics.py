@@ -0,0 +1,96 @@
+"""In-process metrics served as JSON from ``GET /metrics``.
+
+Counters and timings are updated inline; gauges are callables sampled when
+the endpoint is read, so components expose live state (queue depth,
+in-flight counts) without doing any work per request.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Callable, Dict
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Timing:
+    """Count, mean, max and percentiles over the most recent ``window`` samples."""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self._recent.append(ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, peak = self.count, self.total_ms, self.max_ms
+
+        def pct(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 3) if recent else 0.0
+
+        return {
+            "count": count,
+            "mean_ms": round(total / count, 3) if count else 0.0,
+            "max_ms": round(peak, 3),
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._timings: Dict[str, Timing] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        with self._lock:
+            return self._counters.setdefault(name, Counter())
+
+    def timing(self, name: str) -> Timing:
+        with self._lock:
+            return self._timings.setdefault(name, Timing())
+
+    def gauge(self, name: str, fn: Callable[[], Any]) -> None:
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = dict(self._timings)
+            gauges = dict(self._gauges)
+        data: Dict[str, Any] = {name: c.snapshot() for name, c in counters.items()}
+        data.update({name: t.snapshot() for name, t in timings.items()})
+        for name, fn in gauges.items():
+            try:
+                data[name] = fn()
+            except Exception as exc:  # a broken gauge must not hide the others
+                data[name] = f"error: {exc}"
+        return dict(sorted(data.items()))
+
+
+registry = Registry()
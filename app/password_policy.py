@@ -0,0 +1,158 @@
+"""Local enforcement of the user pool's password policy.
+
+The policy is read once with ``DescribeUserPool``, persisted as warm state
+and refreshed in the background every ``PASSWORD_POLICY_TTL`` seconds.
+Passwords that Cognito would reject raise the same
+``InvalidPasswordException`` locally, so callers see identical errors
+without the round trip. If the policy cannot be read (for example the role
+lacks ``cognito-idp:DescribeUserPool``) nothing is enforced locally and
+Cognito stays the only check.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from . import warm_state
+from .cognito import cognito
+from .config import settings
+
+
+# Characters Cognito accepts as symbols
+SYMBOLS = frozenset("^$*.[]{}()?\"!@#%&/\\,><':;|_~`=+- ")
+
+# Wait this long before retrying after DescribeUserPool fails
+RETRY_AFTER = 60.0
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    minimum_length: int = 8
+    require_uppercase: bool = True
+    require_lowercase: bool = True
+    require_numbers: bool = True
+    require_symbols: bool = True
+
+    @classmethod
+    def from_cognito(cls, policy: Dict[str, Any]) -> "PasswordPolicy":
+        return cls(
+            minimum_length=policy.get("MinimumLength", 8),
+            require_uppercase=policy.get("RequireUppercase", False),
+            require_lowercase=policy.get("RequireLowercase", False),
+            require_numbers=policy.get("RequireNumbers", False),
+            require_symbols=policy.get("RequireSymbols", False),
+        )
+
+    def violation(self, password: str) -> Optional[str]:
+        """Cognito's message for the first rule ``password`` breaks, if any."""
+
+        if len(password) < self.minimum_length:
+            return "Password did not conform with policy: Password not long enough"
+        if self.require_uppercase and not any("A" <= c <= "Z" for c in password):
+            return "Password did not conform with policy: Password must have uppercase characters"
+        if self.require_lowercase and not any("a" <= c <= "z" for c in password):
+            return "Password did not conform with policy: Password must have lowercase characters"
+        if self.require_numbers and not any("0" <= c <= "9" for c in password):
+            return "Password did not conform with policy: Password must have numeric characters"
+        if self.require_symbols and not any(c in SYMBOLS for c in password):
+            return "Password did not conform with policy: Password must have symbol characters"
+        return None
+
+
+class PolicyCache:
+    """The pool's ``PasswordPolicy``, refreshed in the background when stale."""
+
+    name = "password_policy"
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._policy: Optional[PasswordPolicy] = None
+        self._fetched_at = 0.0
+        self._failed_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self) -> Optional[PasswordPolicy]:
+        if not self._loaded:
+            self._load()
+        elif time.monotonic() - self._fetched_at > self.ttl:
+            self._refresh_in_background()
+        return self._policy
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            saved = warm_state.load(self.name, max_age=self.ttl)
+            if saved is not None:
+                try:
+                    self._policy = PasswordPolicy(**saved)
+                    self._fetched_at = time.monotonic()
+                except (TypeError, ValueError):  # written by another version; refetch and overwrite it
+                    saved = None
+            retry_due = not self._failed_at or time.monotonic() - self._failed_at >= RETRY_AFTER
+            if saved is None and retry_due:
+                self._fetch()
+            self._loaded = self._policy is not None
+
+    def _fetch(self) -> None:
+        try:
+            resp = cognito.describe_user_pool(UserPoolId=settings.user_pool_id)
+        except Exception:
+            self._failed_at = time.monotonic()
+            return
+        policy = PasswordPolicy.from_cognito(
+            resp.get("UserPool", {}).get("Policies", {}).get("PasswordPolicy", {})
+        )
+        self._policy, self._fetched_at = policy, time.monotonic()
+        warm_state.save(self.name, policy.__dict__)
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            # Push the deadline forward so a failing fetch is retried after RETRY_AFTER, not every call
+            self._fetched_at = time.monotonic() - self.ttl + RETRY_AFTER
+
+        def run():
+            try:
+                self._fetch()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="password-policy-refresh", daemon=True).start()
+
+
+policy_cache = PolicyCache(settings.password_policy_ttl)
+
+
+def check_password(password: str, operation: str) -> None:
+    """Raise Cognito's ``InvalidPasswordException`` if ``password`` breaks the policy."""
+
+    if password != password.strip():
+        # Rejected by the API's input constraint before the policy is consulted
+        raise cognito.exceptions.InvalidParameterException(
+            {"Error": {
+                "Code": "InvalidParameterException",
+                "Message": (
+                    "1 validation error detected: Value at 'password' failed to satisfy constraint: "
+                    "Member must satisfy regular expression pattern: ^[\\S]+.*[\\S]+$"
+                ),
+            }},
+            operation,
+        )
+
+    policy = policy_cache.get()
+    if policy is None:
+        return
+    message = policy.violation(password)
+    if message is not None:
+        raise cognito.exceptions.InvalidPasswordException(
+            {"Error": {"Code": "InvalidPasswordException", "Message": message}},
+            operation,
+        )
@@ -0,0 +1,144 @@
+"""Independently cached pieces of the user profile, fetched concurrently.
+
+``GET /profile`` returns the ``attributes`` part; with ``?include=`` (or
+``PROFILE_PARTS``) it also returns other parts such as ``groups`` and
+``devices``. Parts missing from their cache are fetched in parallel on a
+shared pool under one ``PROFILE_DEADLINE``, so an enriched profile costs
+about as much as its slowest Cognito call rather than the sum. A part that
+fails or misses the deadline is reported under ``errors`` instead of
+failing the whole response; one that finishes late is still cached.
+
+Register more parts with ``@part(name, ttl)``; the function receives the
+access token and its claims and returns a JSON-serialisable value.
+"""
+
+from __future__ import annotations
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from botocore.exceptions import ClientError
+
+from . import shmcache
+from .cognito import cognito
+from .conditional import etag_for
+from .config import settings
+
+
+Fetch = Callable[[str, Dict[str, Any]], Any]
+
+
+class Part:
+    def __init__(self, name: str, fetch: Fetch, ttl: float, render: Callable[[Any], Any] = lambda value: value):
+        self.name = name
+        self.fetch = fetch
+        self.render = render
+        # Shared between workers when SHARED_CACHE is set, so invalidate() after an
+        # update reaches all of them; no per-process front, which would keep stale copies
+        self.cache = shmcache.ttl_cache(f"profile.{name}", 10000, ttl, local=False)
+
+    def load(self, token: str, claims: Dict[str, Any]) -> Any:
+        value = self.fetch(token, claims)
+        if self.cache.ttl > 0 and claims.get("sub"):
+            self.cache.set(claims["sub"], value)
+        return value
+
+
+# part name -> Part
+parts: Dict[str, Part] = {}
+
+
+def part(name: str, ttl: float, render: Callable[[Any], Any] = lambda value: value):
+    """Register the function that fetches the ``name`` part."""
+
+    def decorator(fn: Fetch) -> Fetch:
+        parts[name] = Part(name, fn, ttl, render)
+        return fn
+
+    return decorator
+
+
+def _username(claims: Dict[str, Any]) -> str:
+    return claims.get("username") or claims.get("cognito:username") or claims["sub"]
+
+
+@part("attributes", ttl=settings.profile_cache_ttl, render=lambda value: value[1])
+def _fetch_attributes(token, claims):
+    # Cached as (etag, attributes) so the plain GET /profile can answer 304s
+    resp = cognito.get_user(AccessToken=token)
+    attrs = {a["Name"]: a["Value"] for a in resp.get("UserAttributes", [])}
+    return etag_for(attrs), attrs
+
+
+@part("groups", ttl=settings.profile_groups_ttl)
+def _fetch_groups(token, claims):
+    groups, kwargs = [], {"UserPoolId": settings.user_pool_id, "Username": _username(claims)}
+    while True:
+        resp = cognito.admin_list_groups_for_user(**kwargs)
+        groups.extend(g["GroupName"] for g in resp.get("Groups", []))
+        if not resp.get("NextToken"):
+            return groups
+        kwargs["NextToken"] = resp["NextToken"]
+
+
+@part("devices", ttl=settings.profile_devices_ttl)
+def _fetch_devices(token, claims):
+    resp = cognito.list_devices(AccessToken=token, Limit=60)
+    devices = []
+    for device in resp.get("Devices", []):
+        last = device.get("DeviceLastAuthenticatedDate")
+        devices.append({
+            "key": device.get("DeviceKey"),
+            "attributes": {a["Name"]: a["Value"] for a in device.get("DeviceAttributes", [])},
+            "last_authenticated": last.isoformat() if last else None,
+        })
+    return devices
+
+
+# Sized like the botocore pool: more threads would only wait for a connection
+_pool = ThreadPoolExecutor(max_workers=settings.cognito_max_pool_connections, thread_name_prefix="profile-part")
+
+
+def _error(exc: Exception) -> str:
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code") or str(exc)
+    return str(exc)
+
+
+def gather(
+    names: Iterable[str], token: str, claims: Dict[str, Any], timeout: float
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Rendered values for ``names`` and an error per part that could not be fetched."""
+
+    names = list(names)
+    sub = claims.get("sub")
+    values: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    pending = {}
+    for name in names:
+        cached = parts[name].cache.get(sub) if sub else None
+        if cached is not None:
+            values[name] = cached
+            continue
+        # Each call gets a copy of the request's context so per-request
+        # instrumentation (profiling, auth events) still sees it
+        context = contextvars.copy_context()
+        pending[_pool.submit(context.run, parts[name].load, token, claims)] = name
+
+    if pending:
+        done, late = wait(pending, timeout=timeout)
+        for future in done:
+            try:
+                values[pending[future]] = future.result()
+            except Exception as exc:
+                errors[pending[future]] = _error(exc)
+        for future in late:
+            errors[pending[future]] = "timed out"
+
+    return {name: parts[name].render(values[name]) for name in names if name in values}, errors
+
+
+def invalidate(sub: str, *names: str) -> None:
+    for name in names or parts:
+        parts[name].cache.delete(sub)
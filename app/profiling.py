@@ -0,0 +1,227 @@
+"""Opt-in per-request CPU profiling.
+
+A request is profiled when it is sampled (``PROFILE_SAMPLE_RATE``) or when it
+carries a valid ``X-Profile`` header signed with ``PROFILE_SECRET``. The
+signature covers the method and path, so a captured header cannot switch
+profiling on for other routes. The profile is written as a pstats file next
+to a JSON sidecar that records the route and every Cognito call made while
+the request ran. Writing happens on a background thread, and only the newest
+``PROFILE_MAX_FILES`` profiles are kept. Requests that are not selected pay
+for one header lookup and, if sampling is on, one random draw.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask, g, request
+
+from .config import settings
+from .metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Cognito calls for the request currently being profiled, or None.
+_calls: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("profiled_calls", default=None)
+
+Sink = Callable[[cProfile.Profile, Dict[str, Any]], None]
+
+
+def _signature(secret: str, expires: str, method: str, path: str) -> str:
+    message = f"{expires}\n{method.upper()}\n{path}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def sign_profile_header(secret: str, method: str, path: str, ttl: int = 300) -> str:
+    """Build an ``X-Profile`` header value for ``method path``, valid for ``ttl`` seconds."""
+
+    expires = str(int(time.time()) + ttl)
+    return f"{expires}.{_signature(secret, expires, method, path)}"
+
+
+def _valid_signature(value: str, secret: str, method: str, path: str) -> bool:
+    expires, _, sig = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(sig, _signature(secret, expires, method, path))
+
+
+_PROFILE_FILE = re.compile(r"^\d+-[0-9a-f]{8}\.prof$")
+
+
+def file_sink(directory: str, max_files: int = 200) -> Sink:
+    """Write ``<id>.prof`` (pstats) and ``<id>.json`` (tags) into ``directory``.
+
+    Only the newest ``max_files`` profiles are kept; older pairs are removed.
+    """
+
+    written: Optional[deque] = None
+
+    def sink(profiler: cProfile.Profile, record: Dict[str, Any]) -> None:
+        nonlocal written
+        os.makedirs(directory, exist_ok=True)
+        if written is None:  # count profiles left by earlier processes too
+            existing = [name[:-5] for name in os.listdir(directory) if _PROFILE_FILE.match(name)]
+            written = deque(sorted(existing, key=lambda i: os.path.getmtime(os.path.join(directory, f"{i}.prof"))))
+        base = os.path.join(directory, record["id"])
+        profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.json", "w", encoding="utf-8") as fh:
+            json.dump(record, fh, indent=2)
+        written.append(record["id"])
+        while len(written) > max_files:
+            old = os.path.join(directory, written.popleft())
+            for suffix in (".prof", ".json"):
+                try:
+                    os.unlink(old + suffix)
+                except FileNotFoundError:
+                    pass
+
+    return sink
+
+
+class BackgroundSink:
+    """Hands profiles to ``sink`` on a background thread.
+
+    At most ``capacity`` profiles wait to be written; more are dropped and
+    counted in ``profiling.dropped`` rather than slowing requests.
+    """
+
+    def __init__(self, sink: Sink, capacity: int = 16):
+        self.sink = sink
+        self.capacity = capacity
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._dropped = registry.counter("profiling.dropped")
+        self._written = registry.counter("profiling.written")
+
+    def __call__(self, profiler: cProfile.Profile, record: Dict[str, Any]) -> None:
+        if self._pid != os.getpid():
+            self._start()  # first use, or first use in a forked worker
+        try:
+            self._queue.put_nowait((profiler, record))
+        except queue.Full:
+            self._dropped.inc()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = pending = queue.Queue(maxsize=self.capacity)
+        threading.Thread(target=self._run, args=(pending,), name="profile-writer", daemon=True).start()
+
+    def _run(self, pending: queue.Queue) -> None:
+        while True:
+            profiler, record = pending.get()
+            try:
+                self.sink(profiler, record)
+                self._written.inc()
+            except Exception as exc:  # never lose the writer over one profile
+                logger.warning("Could not write profile %s: %s", record["id"], exc)
+
+
+def _before_cognito_call(context, **kwargs):
+    if _calls.get() is not None:
+        context["profile_start"] = time.perf_counter()
+
+
+def _after_cognito_call(model, http_response, context, **kwargs):
+    calls = _calls.get()
+    if calls is None or "profile_start" not in context:
+        return
+    calls.append({
+        "operation": model.name,
+        "status": http_response.status_code,
+        "ms": round((time.perf_counter() - context["profile_start"]) * 1000, 3),
+    })
+
+
+def instrument_client(client) -> None:
+    """Record calls made through a boto3 ``client`` while profiling is active."""
+
+    events = client.meta.events
+    events.register("before-call.*.*", _before_cognito_call, unique_id="profiling-before-call")
+    events.register("after-call.*.*", _after_cognito_call, unique_id="profiling-after-call")
+
+
+def init_profiling(app: Flask, sink: Optional[Sink] = None) -> None:
+    """Install the profiling hooks on ``app`` if profiling is configured."""
+
+    rate = settings.profile_sample_rate
+    secret = settings.profile_secret
+    if rate <= 0 and not secret:
+        return
+
+    from .cognito import cognito
+
+    instrument_client(cognito)
+    sink = sink or BackgroundSink(file_sink(settings.profile_dir, settings.profile_max_files))
+
+    @app.before_request
+    def start_profile():
+        header = request.headers.get(PROFILE_HEADER)
+        if header and secret:
+            selected = _valid_signature(header, secret, request.method, request.path)
+        else:
+            selected = rate > 0 and random.random() < rate
+        if not selected:
+            return None
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler already owns this thread
+            return None
+        g.profile = (profiler, _calls.set([]), time.perf_counter())
+        return None
+
+    @app.after_request
+    def tag_profile(response):
+        if "profile" in g:
+            g.profile_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+            response.headers[PROFILE_ID_HEADER] = g.profile_id
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        state = g.pop("profile", None)
+        if state is None:
+            return
+        profiler, token, started = state
+        profiler.disable()
+        calls = _calls.get()
+        _calls.reset(token)
+
+        record = {
+            "id": g.pop("profile_id", None) or f"{int(time.time())}-{uuid.uuid4().hex[:8]}",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "rule": request.url_rule.rule if request.url_rule else None,
+            "ms": round((time.perf_counter() - started) * 1000, 3),
+            "error": repr(exc) if exc else None,
+            "cognito_calls": calls,
+        }
+        try:
+            sink(profiler, record)
+        except Exception as sink_exc:  # never fail the request over a profile
+            app.logger.warning("Could not write profile %s: %s", record["id"], sink_exc)
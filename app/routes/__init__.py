@@ -1,5 +1,9 @@
 """Blueprint registration."""
 
+from .batch import bp as batch_bp
+from .gateway import bp as gateway_bp
+from .jobs import bp as jobs_bp
+from .metrics import bp as metrics_bp
 from .password import bp as password_bp
 from .profile import bp as profile_bp
 from .registration import bp as registration_bp
@@ -13,3 +17,7 @@ def register_blueprints(app):
     app.register_blueprint(password_bp)
     app.register_blueprint(profile_bp)
     app.register_blueprint(social_bp)
+    app.register_blueprint(gateway_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
@@ -0,0 +1,261 @@
+"""Several API calls in one round trip.
+
+``POST /batch`` runs an ordered list of steps as sub-requests through the
+same WSGI app, so every blueprint, hook and limit applies to each step as
+if it had been called directly. A string in a step's path, headers or body
+may reference an earlier step's JSON response as ``{{login.access_token}}``;
+the step then waits for that one. Steps with nothing to wait for run
+concurrently.
+"""
+
+import json
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from ..config import settings
+from ..metrics import registry
+from ..validation import validate_body
+
+
+bp = Blueprint("batch", __name__)
+
+Result = Dict[str, Any]
+
+_REFERENCE = re.compile(r"\{\{\s*([A-Za-z0-9_-]+)((?:\.[^.{}\s]+)*)\s*\}\}")
+# Response headers worth handing back per step; Set-Cookie goes on the batch response
+RESULT_HEADERS = ("ETag", "Cache-Control", "Location", "Retry-After", "WWW-Authenticate")
+# Set on every sub-request's environ, so /batch refuses to run inside a batch
+# however its path was spelled
+NESTED_MARKER = "cognito_auth_kit.batch_step"
+
+_pool = ThreadPoolExecutor(
+    max_workers=settings.batch_workers or settings.cognito_max_pool_connections, thread_name_prefix="batch-step"
+)
+_steps = registry.counter("batch.steps")
+_skipped = registry.counter("batch.steps_skipped")
+
+
+class _Unresolved(Exception):
+    pass
+
+
+def references(value: Any) -> List[str]:
+    """Step ids referenced anywhere in ``value``."""
+
+    if isinstance(value, str):
+        return [m.group(1) for m in _REFERENCE.finditer(value)]
+    if isinstance(value, dict):
+        return [ref for v in value.values() for ref in references(v)]
+    if isinstance(value, list):
+        return [ref for v in value for ref in references(v)]
+    return []
+
+
+def _lookup(results: Dict[str, Result], step_id: str, path: str) -> Any:
+    value = results[step_id].get("body")
+    for key in filter(None, path.split(".")):
+        if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise _Unresolved(f"{step_id}{path}")
+    return value
+
+
+def resolve(value: Any, results: Dict[str, Result]) -> Any:
+    """``value`` with references replaced; a string that is one reference keeps its type."""
+
+    if isinstance(value, str):
+        whole = _REFERENCE.fullmatch(value)
+        if whole:
+            return _lookup(results, whole.group(1), whole.group(2))
+        return _REFERENCE.sub(lambda m: str(_lookup(results, m.group(1), m.group(2))), value)
+    if isinstance(value, dict):
+        return {k: resolve(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, results) for v in value]
+    return value
+
+
+def _cookies(set_cookie: List[str]) -> Dict[str, str]:
+    jar = SimpleCookie()
+    for header in set_cookie:
+        jar.load(header)
+    return {name: morsel.value for name, morsel in jar.items()}
+
+
+def run_step(
+    app, base_url: str, environ_base: Dict[str, Any], step: Dict[str, Any], headers: Dict[str, str]
+) -> Result:
+    """Dispatch one resolved step through ``app`` and collect its response."""
+
+    builder = EnvironBuilder(
+        path=step["path"],
+        method=step.get("method", "GET"),
+        headers=headers,
+        json=step["body"] if "body" in step else None,
+        base_url=base_url,
+        environ_base=environ_base,
+    )
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    app_iter, status, response_headers = run_wsgi_app(app.wsgi_app, environ, buffered=True)
+    try:
+        data = b"".join(app_iter)
+    finally:
+        if hasattr(app_iter, "close"):
+            app_iter.close()
+
+    if response_headers.get("Content-Type", "").startswith("application/json") and data:
+        body = json.loads(data)
+    else:
+        body = data.decode("utf-8", "replace") or None
+    return {
+        "id": step["id"],
+        "status": int(status.split(" ", 1)[0]),
+        "headers": {name: response_headers[name] for name in RESULT_HEADERS if name in response_headers},
+        "body": body,
+        "set_cookie": response_headers.getlist("Set-Cookie"),
+    }
+
+
+def _is_batch(path: Any) -> bool:
+    return isinstance(path, str) and path.split("?", 1)[0].rstrip("/") == "/batch"
+
+
+def _skip(step_id: str, status: int, error: str) -> Result:
+    _skipped.inc()
+    return {"id": step_id, "status": status, "headers": {}, "body": {"error": error}, "set_cookie": []}
+
+
+def _plan(steps: List[Dict[str, Any]]) -> Tuple[Optional[str], Dict[str, List[str]]]:
+    """Each step's dependencies, or an error if a step waits on itself, a later or an unknown step."""
+
+    seen: List[str] = []
+    depends: Dict[str, List[str]] = {}
+    for step in steps:
+        step_id = step["id"]
+        if step_id in seen:
+            return f"Duplicate step id {step_id!r}", {}
+        if _is_batch(step["path"]):
+            return "Batches cannot be nested", {}
+        needs = list(dict.fromkeys(
+            references([step["path"], step.get("headers", {}), step.get("body")]) + step.get("depends_on", [])
+        ))
+        for dep in needs:
+            if dep not in seen:
+                return f"Step {step_id!r} refers to {dep!r}, which is not an earlier step", {}
+        depends[step_id] = needs
+        seen.append(step_id)
+    return None, depends
+
+
+@bp.route("/batch", methods=["POST"])
+@validate_body("BatchRequest")
+def batch():
+    """
+    Run several API calls in one request.
+    Steps are sub-requests to this API and answer exactly as the direct
+    calls would. Strings in a step's `path`, `headers` or `body` can use
+    `{{id.field}}` to insert a field from an earlier step's JSON response
+    (`{{login.access_token}}`); such steps, and those naming earlier steps in
+    `depends_on`, wait for them, and are answered with 424 without running
+    if one of them failed. All other steps run concurrently. Steps inherit
+    this request's `Authorization` and cookies unless they set their own
+    headers, cookies set by a step are passed on to the steps that wait for
+    it, and all of them are set on the batch response.
+    ---
+    tags:
+      - Batch
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          $ref: '#/definitions/BatchRequest'
+    responses:
+      200:
+        description: One result per step, in request order.
+        schema:
+          $ref: '#/definitions/BatchResponse'
+      400:
+        description: Invalid steps.
+        schema:
+          $ref: '#/definitions/ValidationErrorResponse'
+    """
+    if request.environ.get(NESTED_MARKER):
+        return jsonify({"error": "Batches cannot be nested"}), 400
+    steps = request.get_json()["steps"]
+    error, depends = _plan(steps)
+    if error:
+        return jsonify({"error": error}), 400
+
+    app = current_app._get_current_object()
+    base_url = request.host_url
+    environ_base = {"REMOTE_ADDR": request.remote_addr, NESTED_MARKER: True}
+    inherited = {"Authorization": request.headers["Authorization"]} if "Authorization" in request.headers else {}
+    cookies = dict(request.cookies)
+
+    results: Dict[str, Result] = {}
+    waiting = list(steps)
+    running = {}
+    while waiting or running:
+        for step in list(waiting):
+            needs = depends[step["id"]]
+            if any(dep not in results for dep in needs):
+                continue
+            waiting.remove(step)
+            failed = next((dep for dep in needs if results[dep]["status"] >= 400), None)
+            if failed:
+                results[step["id"]] = _skip(step["id"], 424, f"Step {failed!r} failed")
+                continue
+            try:
+                resolved = resolve({k: step[k] for k in ("path", "headers", "body") if k in step}, results)
+            except _Unresolved as exc:
+                results[step["id"]] = _skip(step["id"], 400, f"Step {step['id']!r} refers to missing {exc}")
+                continue
+            if _is_batch(resolved["path"]):
+                # Checked again once resolved: nested batches would wait on _pool from inside it
+                results[step["id"]] = _skip(step["id"], 400, "Batches cannot be nested")
+                continue
+
+            step_cookies = dict(cookies)
+            for dep in needs:
+                step_cookies.update(_cookies(results[dep]["set_cookie"]))
+            headers = dict(inherited)
+            if step_cookies:
+                headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in step_cookies.items())
+            headers.update(resolved.pop("headers", {}))
+            _steps.inc()
+            running[_pool.submit(run_step, app, base_url, environ_base, dict(step, **resolved), headers)] = step["id"]
+
+        if running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                try:
+                    results[step_id] = future.result()
+                except Exception as exc:  # the sub-request never produced a response
+                    results[step_id] = _skip(step_id, 500, str(exc))
+
+    response = jsonify({
+        "results": [
+            {k: v for k, v in results[step["id"]].items() if k != "set_cookie"} for step in steps
+        ]
+    })
+    for step in steps:
+        for header in results[step["id"]]["set_cookie"]:
+            response.headers.add("Set-Cookie", header)
+    return response
@@ -0,0 +1,126 @@
+"""Subrequest authorizer for reverse proxies (nginx ``auth_request`` and the like)."""
+
+import time
+from typing import Any, List, Optional, Tuple
+
+from flask import Blueprint, Response, request
+
+from .. import auth_events, shmcache
+from ..cognito import verify_jwt
+from ..tokens import token_digest
+from ..config import settings
+from ..metrics import registry
+
+
+bp = Blueprint("gateway", __name__)
+
+Headers = List[Tuple[str, str]]
+# (status, response headers, rejection reason)
+Decision = Tuple[int, Headers, Optional[str]]
+
+
+def parse_claim_headers(spec: str) -> List[Tuple[str, str]]:
+    """``"X-User-Sub=sub,X-User-Groups=cognito:groups"`` -> ``[(header, claim), ...]``."""
+
+    pairs = []
+    for item in spec.split(","):
+        header, sep, claim = item.strip().partition("=")
+        if sep and header and claim:
+            pairs.append((header.strip(), claim.strip()))
+    return pairs
+
+
+CLAIM_HEADERS = parse_claim_headers(settings.gateway_claim_headers)
+
+_CHALLENGE = ("WWW-Authenticate", 'Bearer error="invalid_token"')
+_MISSING: Decision = (401, [("WWW-Authenticate", "Bearer")], "missing")
+
+# token digest -> Decision; allows expire with the token, denials after GATEWAY_DENY_TTL.
+# Denials get their own small cache so a flood of junk tokens cannot evict
+# the allows. Shared by the workers with SHARED_CACHE, where decisions come
+# back as lists.
+_decisions = shmcache.ttl_cache("gateway", settings.gateway_cache_max_entries, settings.gateway_cache_ttl)
+_denials = shmcache.ttl_cache("gateway.denied", settings.gateway_deny_max_entries, settings.gateway_deny_ttl)
+_hits = registry.counter("gateway.cache_hits")
+_misses = registry.counter("gateway.cache_misses")
+registry.gauge("gateway.cached_decisions", lambda: len(_decisions))
+registry.gauge("gateway.cached_denials", lambda: len(_denials))
+
+
+def _header_value(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    return str(value)
+
+
+def decide(token: str) -> Tuple[Decision, bool]:
+    """The decision for ``token`` and whether it came from the cache."""
+
+    key = token_digest(token)
+    decision = _decisions.get(key)
+    if decision is None:
+        decision = _denials.get(key)
+    if decision is not None:
+        _hits.inc()
+        return decision, True
+
+    _misses.inc()
+    try:
+        claims = verify_jwt(token)
+    except Exception as exc:
+        decision = (401, [_CHALLENGE], type(exc).__name__)
+        _denials.set(key, decision)
+        return decision, False
+
+    headers = [(header, _header_value(claims[claim])) for header, claim in CLAIM_HEADERS if claim in claims]
+    decision = (200, headers, None)
+    ttl = min(settings.gateway_cache_ttl, claims.get("exp", 0) - time.time())
+    if ttl > 0:
+        _decisions.set(key, decision, ttl)
+    return decision, False
+
+
+@bp.route("/auth/check", methods=["GET"])
+def check():
+    """
+    Authorize a proxy subrequest from its `Authorization` header.
+    Answers 200 or 401 with an empty body; on 200 the configured claims
+    (`GATEWAY_CLAIM_HEADERS`) are returned as headers for the proxy to
+    forward upstream. Decisions are cached per token, so repeated
+    subrequests skip signature verification.
+    ---
+    tags:
+      - Gateway
+    security:
+      - bearerAuth: []
+    parameters:
+      - in: header
+        name: Authorization
+        required: true
+        description: The `Authorization` header of the original request.
+        type: string
+        default: "Bearer <ACCESS_TOKEN>"
+    responses:
+      200:
+        description: Token is valid.
+        headers:
+          X-User-Sub:
+            type: string
+            description: The `sub` claim.
+          X-User-Groups:
+            type: string
+            description: Comma separated `cognito:groups`.
+          X-User-Email:
+            type: string
+            description: The `email` claim, when present.
+      401:
+        description: Missing, expired or invalid token.
+    """
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        (status, headers, reason), cached = decide(auth[7:])
+    else:
+        (status, headers, reason), cached = _MISSING, False
+    if reason and not cached:
+        auth_events.mark("token_rejected", reason=reason)
+    return Response(status=status, headers=headers)
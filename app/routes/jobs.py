@@ -0,0 +1,45 @@
+"""Status of work queued in async dispatch mode."""
+
+from flask import Blueprint, jsonify
+
+from .. import jobs
+
+
+bp = Blueprint("jobs", __name__)
+
+
+@bp.route("/auth/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Outcome of a request queued by `ASYNC_DISPATCH` mode.
+    ---
+    tags:
+      - Registration
+    produces:
+      - application/json
+    parameters:
+      - in: path
+        name: job_id
+        type: string
+        required: true
+        description: The `job_id` returned with the 202 response.
+    responses:
+      200:
+        description: Job state; once finished, `status` and `result` are what the synchronous endpoint would have returned.
+        schema:
+          $ref: '#/definitions/JobStatusResponse'
+      404:
+        description: Unknown or expired job, or async dispatch is disabled.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    job = jobs.queue.get(job_id) if jobs.queue else None
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({
+        "job_id": job["id"],
+        "state": job["state"],
+        "status": job.get("status"),
+        "result": job.get("result"),
+    })
@@ -0,0 +1,26 @@
+"""Operational metrics."""
+
+from flask import Blueprint, jsonify
+
+from ..metrics import registry
+
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    In-process counters, timings and gauges for this worker.
+    ---
+    tags:
+      - Operations
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Flat map of metric name to value; timings are objects with count, mean, max, p50 and p99.
+        schema:
+          $ref: '#/definitions/MetricsResponse'
+    """
+    return jsonify(registry.snapshot())
@@ -2,14 +2,20 @@
 
 from flask import Blueprint, jsonify, request
 
-from ..cognito import cognito, get_secret_hash
+from .. import jobs
+from ..cognito import cognito, error_status, get_secret_hash
 from ..config import settings
+from ..idempotency import idempotent
+from ..password_policy import check_password
+from ..validation import validate_body
 
 
 bp = Blueprint("password", __name__)
 
 
 @bp.route("/auth/forgot-password", methods=["POST"])
+@idempotent
+@validate_body("ForgotPasswordRequest")
 def forgot_password():
     """
     Start reset password flow – sends code by email/SMS.
@@ -34,6 +40,10 @@ def forgot_password():
         description: Reset code sent if account exists.
         schema:
           $ref: '#/definitions/ForgotPasswordResponse'
+      202:
+        description: Queued (`ASYNC_DISPATCH` mode); poll `status_url` for the outcome.
+        schema:
+          $ref: '#/definitions/JobAcceptedResponse'
       400:
         description: Invalid payload or Cognito error.
         schema:
@@ -42,12 +52,30 @@ def forgot_password():
         description: User not found (only returned for debugging configs).
         schema:
           $ref: '#/definitions/ErrorResponse'
+      429:
+        description: Cognito throttled the request; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+      503:
+        description: Cognito failed or could not be reached; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
     """
     data = request.get_json() or {}
     email = data.get("email")
     if not email:
         return jsonify({"error": "email required"}), 400
 
+    if jobs.queue:
+        return jobs.accepted(jobs.queue.submit("password.forgot", {"email": email}))
+
+    body, status = _forgot_password({"email": email})
+    return jsonify(body), status
+
+
+@jobs.handler("password.forgot")
+def _forgot_password(params):
+    email = params["email"]
     try:
         resp = cognito.forgot_password(
             ClientId=settings.client_id,
@@ -55,17 +83,18 @@ def forgot_password():
             SecretHash=get_secret_hash(email),
         )
     except cognito.exceptions.UserNotFoundException:
-        return jsonify({"error": "User not found"}), 404
+        return {"error": "User not found"}, 404
     except Exception as exc:
-        return jsonify({"error": str(exc)}), 400
+        return {"error": str(exc)}, error_status(exc)
 
-    return jsonify({
+    return {
         "message": "If the account exists, a reset code has been sent",
         "codeDelivery": resp.get("CodeDeliveryDetails"),
-    })
+    }, 200
 
 
 @bp.route("/auth/reset-password", methods=["POST"])
+@validate_body("ResetPasswordRequest")
 def reset_password():
     """
     Complete reset password with code + new password.
@@ -96,6 +125,14 @@ def reset_password():
         description: Invalid code or weak password.
         schema:
           $ref: '#/definitions/ErrorResponse'
+      429:
+        description: Cognito throttled the request; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+      503:
+        description: Cognito failed or could not be reached; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
     """
     data = request.get_json() or {}
     email = data.get("email")
@@ -106,6 +143,7 @@ def reset_password():
         return jsonify({"error": "email, code and new_password required"}), 400
 
     try:
+        check_password(new_password, "ConfirmForgotPassword")
         cognito.confirm_forgot_password(
             ClientId=settings.client_id,
             Username=email,
@@ -114,6 +152,6 @@ def reset_password():
             SecretHash=get_secret_hash(email),
         )
     except Exception as exc:
-        return jsonify({"error": str(exc)}), 400
+        return jsonify({"error": str(exc)}), error_status(exc)
 
     return jsonify({"message": "Password reset successful"})
@@ -2,18 +2,39 @@
 
 from flask import Blueprint, jsonify, request
 
+from .. import profile_parts
 from ..cognito import cognito
+from ..conditional import conditional_json
+from ..config import settings
 from ..decorators import require_bearer_token
+from ..validation import validate_body
 
 
 bp = Blueprint("profile", __name__)
 
+# sub -> (etag, attributes); lets a matching If-None-Match skip GetUser
+_attributes = profile_parts.parts["attributes"].cache
+
+
+def _part_names(spec: str):
+    return list(dict.fromkeys(name.strip() for name in spec.split(",") if name.strip()))
+
+
+DEFAULT_PARTS = _part_names(settings.profile_parts)
+_unknown = set(DEFAULT_PARTS) - set(profile_parts.parts)
+if _unknown:
+    raise RuntimeError(f"Unknown PROFILE_PARTS {sorted(_unknown)}; expected some of {sorted(profile_parts.parts)}")
+
 
 @bp.route("/profile", methods=["GET"])
 @require_bearer_token
 def get_profile():
     """
     Get current user's attributes from Cognito.
+    Supports `If-None-Match`; while the attribute version is cached
+    (`PROFILE_CACHE_TTL`) a matching ETag is answered without calling Cognito.
+    `include=groups,devices` adds those parts, fetched concurrently and
+    cached separately; parts that fail are listed under `errors`.
     ---
     tags:
       - Session
@@ -28,23 +49,55 @@ def get_profile():
         description: Format `Bearer <access_token>` returned by `/auth/login`.
         type: string
         default: "Bearer <ACCESS_TOKEN>"
+      - in: query
+        name: include
+        required: false
+        description: Comma separated extra parts (`groups`, `devices`); defaults to `PROFILE_PARTS`.
+        type: string
     responses:
       200:
         description: Current user attributes from Cognito.
         schema:
           $ref: '#/definitions/ProfileAttributesResponse'
+      304:
+        description: Attributes unchanged since the `If-None-Match` ETag.
+      400:
+        description: Unknown part in `include`.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
       401:
         description: Missing or invalid token.
         schema:
           $ref: '#/definitions/ErrorResponse'
     """
-    resp = cognito.get_user(AccessToken=request.token)
-    attrs = {a["Name"]: a["Value"] for a in resp.get("UserAttributes", [])}
-    return jsonify({"attributes": attrs})
+    include = request.args.get("include")
+    names = DEFAULT_PARTS if include is None else _part_names(include)
+    unknown = [name for name in names if name not in profile_parts.parts]
+    if unknown:
+        return jsonify({"error": f"Unknown profile parts: {', '.join(unknown)}"}), 400
+    if any(name != "attributes" for name in names):
+        return _enriched_profile(["attributes"] + [name for name in names if name != "attributes"])
+
+    sub = request.claims.get("sub")
+    cached = _attributes.get(sub) if sub else None
+    if cached is None:
+        cached = profile_parts.parts["attributes"].load(request.token, request.claims)
+    etag, attrs = cached
+    return conditional_json({"attributes": attrs}, etag)
+
+
+def _enriched_profile(names):
+    values, errors = profile_parts.gather(names, request.token, request.claims, settings.profile_deadline)
+    if not errors:
+        return conditional_json(values)
+    response = jsonify(dict(values, errors=errors))
+    response.headers["Cache-Control"] = "no-store"  # partial; don't let it stand in for the full profile
+    return response
 
 
 @bp.route("/profile", methods=["POST"])
 @require_bearer_token
+@validate_body("ProfileUpdateRequest")
 def update_profile():
     """
     Update current user's attributes in Cognito.
@@ -114,5 +167,6 @@ def update_profile():
         AccessToken=request.token,
         UserAttributes=user_attrs,
     )
+    _attributes.delete(request.claims.get("sub"))
 
     return jsonify({"message": "Profile updated"})
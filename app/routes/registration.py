@@ -2,14 +2,20 @@
 
 from flask import Blueprint, jsonify, request
 
-from ..cognito import cognito, get_secret_hash
+from .. import jobs
+from ..cognito import cognito, error_status, get_secret_hash
 from ..config import settings
+from ..idempotency import idempotent
+from ..password_policy import check_password
+from ..validation import validate_body
 
 
 bp = Blueprint("registration", __name__)
 
 
 @bp.route("/auth/signup", methods=["POST"])
+@idempotent
+@validate_body("SignupRequest")
 def signup():
     """
     Sign up a new user (no UI, pure API).
@@ -36,6 +42,10 @@ def signup():
         description: Signup initiated and verification code sent.
         schema:
           $ref: '#/definitions/SignupResponse'
+      202:
+        description: Queued (`ASYNC_DISPATCH` mode); poll `status_url` for the outcome.
+        schema:
+          $ref: '#/definitions/JobAcceptedResponse'
       400:
         description: Missing or invalid payload.
         schema:
@@ -44,6 +54,14 @@ def signup():
         description: User already exists.
         schema:
           $ref: '#/definitions/ErrorResponse'
+      429:
+        description: Cognito throttled the request; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+      503:
+        description: Cognito failed or could not be reached; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
     """
     data = request.get_json() or {}
     email = data.get("email")
@@ -52,28 +70,49 @@ def signup():
     if not email or not password:
         return jsonify({"error": "email and password required"}), 400
 
+    try:
+        check_password(password, "SignUp")
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    params = {"email": email, "password": password}
+    if jobs.queue:
+        return jobs.accepted(jobs.queue.submit("registration.signup", params))
+
+    body, status = _sign_up(params)
+    return jsonify(body), status
+
+
+@jobs.handler("registration.signup")
+def _sign_up(params):
+    email = params["email"]
     try:
         resp = cognito.sign_up(
             ClientId=settings.client_id,
             SecretHash=get_secret_hash(email),
             Username=email,
-            Password=password,
+            Password=params["password"],
             UserAttributes=[{"Name": "email", "Value": email}],
         )
     except cognito.exceptions.UsernameExistsException:
-        return jsonify({"error": "User already exists"}), 409
+        if params.get("retried"):
+            # A re-queued job whose first attempt already created the user
+            return {"message": "Signup ok", "userSub": None, "userConfirmed": False, "codeDelivery": None}, 200
+        return {"error": "User already exists"}, 409
     except Exception as exc:
-        return jsonify({"error": str(exc)}), 400
+        return {"error": str(exc)}, error_status(exc)
 
-    return jsonify({
+    return {
         "message": "Signup ok",
         "userSub": resp.get("UserSub"),
         "userConfirmed": resp.get("UserConfirmed"),
         "codeDelivery": resp.get("CodeDeliveryDetails"),
-    })
+    }, 200
 
 
 @bp.route("/auth/confirm", methods=["POST"])
+@idempotent
+@validate_body("ConfirmRequest")
 def confirm_signup():
     """
     Confirm user with the code they received from Cognito.
@@ -103,6 +142,14 @@ def confirm_signup():
         description: Invalid confirmation code or payload.
         schema:
           $ref: '#/definitions/ErrorResponse'
+      429:
+        description: Cognito throttled the request; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+      503:
+        description: Cognito failed or could not be reached; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
     """
     data = request.get_json() or {}
     email = data.get("email")
@@ -119,6 +166,6 @@ def confirm_signup():
             ConfirmationCode=code,
         )
     except Exception as exc:
-        return jsonify({"error": str(exc)}), 400
+        return jsonify({"error": str(exc)}), error_status(exc)
 
     return jsonify({"message": "Account confirmed"})
@@ -2,15 +2,19 @@
 
 from flask import Blueprint, jsonify, request
 
-from ..cognito import cognito, get_secret_hash
+from .. import sessions
+from ..cognito import cognito, error_status, get_secret_hash
+from ..conditional import conditional_json
 from ..config import settings
 from ..decorators import require_bearer_token
+from ..validation import check_body, validate_body
 
 
 bp = Blueprint("session", __name__)
 
 
 @bp.route("/auth/login", methods=["POST"])
+@validate_body("LoginRequest")
 def login():
     """
     Login with email + password using Cognito USER_PASSWORD_AUTH.
@@ -33,7 +37,7 @@ def login():
             password: Str0ngP@ssw0rd!
     responses:
       200:
-        description: Tokens from Cognito.
+        description: Tokens from Cognito, or a session cookie when `SESSION_STORE` is set.
         schema:
           $ref: '#/definitions/TokenResponse'
       400:
@@ -74,19 +78,24 @@ def login():
         return jsonify({"error": str(exc)}), 400
 
     result = resp.get("AuthenticationResult", {})
-    return jsonify({
+    tokens = {
         "access_token": result.get("AccessToken"),
         "id_token": result.get("IdToken"),
         "refresh_token": result.get("RefreshToken"),
         "expires_in": result.get("ExpiresIn"),
         "token_type": result.get("TokenType"),
-    })
+    }
+    if sessions.manager:
+        return sessions.start_session(tokens, email)
+    return jsonify(tokens)
 
 
 @bp.route("/auth/refresh", methods=["POST"])
 def refresh_tokens():
     """
     Refresh tokens using a refresh_token.
+    In session mode the body may be omitted to refresh the session in the cookie;
+    with a body, the new session replaces the one in the cookie.
     ---
     tags:
       - Session
@@ -106,7 +115,7 @@ def refresh_tokens():
             refresh_token: <REFRESH_TOKEN>
     responses:
       200:
-        description: New tokens minted with the refresh token.
+        description: New tokens minted with the refresh token, or a refreshed session cookie in session mode.
         schema:
           $ref: '#/definitions/TokenResponse'
       400:
@@ -117,11 +126,33 @@ def refresh_tokens():
         description: Refresh token expired or revoked.
         schema:
           $ref: '#/definitions/ErrorResponse'
+      429:
+        description: Cognito throttled the refresh; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+      503:
+        description: Cognito failed or could not be reached; retry later.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
     """
-    data = request.get_json() or {}
+    data = request.get_json(silent=True) or {}
     email = data.get("email")
     refresh_token = data.get("refresh_token")
 
+    session_id = sessions.current_session_id() if sessions.manager else None
+    if session_id and not refresh_token:
+        try:
+            record = sessions.manager.refresh(session_id)
+        except Exception as exc:
+            return sessions.refresh_failed(exc)
+        if record is None:
+            return jsonify({"error": "Invalid session"}), 401
+        return sessions.session_response(session_id, record, "Session refreshed")
+
+    failed = check_body("RefreshRequest", data)
+    if failed is not None:
+        return failed
+
     if not email or not refresh_token:
         return jsonify({"error": "email and refresh_token required"}), 400
 
@@ -137,15 +168,51 @@ def refresh_tokens():
     except cognito.exceptions.NotAuthorizedException:
         return jsonify({"error": "Invalid refresh token"}), 401
     except Exception as exc:
-        return jsonify({"error": str(exc)}), 400
+        return jsonify({"error": str(exc)}), error_status(exc)
 
     result = resp.get("AuthenticationResult", {})
-    return jsonify({
+    tokens = {
         "access_token": result.get("AccessToken"),
         "id_token": result.get("IdToken"),
         "expires_in": result.get("ExpiresIn"),
         "token_type": result.get("TokenType"),
-    })
+    }
+    if sessions.manager:
+        if session_id:
+            sessions.manager.revoke(session_id)  # replaced by the new session, not left valid beside it
+        return sessions.start_session(dict(tokens, refresh_token=refresh_token), email)
+    return jsonify(tokens)
+
+
+@bp.route("/auth/logout", methods=["POST"])
+def logout():
+    """
+    End the server-side session in the cookie (session mode only).
+    ---
+    tags:
+      - Session
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Session removed and cookie cleared.
+        schema:
+          $ref: '#/definitions/MessageResponse'
+      400:
+        description: Session mode is not enabled.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    if not sessions.manager:
+        return jsonify({"error": "Session mode is not enabled"}), 400
+
+    session_id = sessions.current_session_id()
+    if session_id:
+        sessions.manager.revoke(session_id)
+
+    response = jsonify({"message": "Logged out"})
+    response.delete_cookie(settings.session_cookie)
+    return response
 
 
 @bp.route("/me", methods=["GET"])
@@ -153,6 +220,7 @@ def refresh_tokens():
 def me():
     """
     Protected endpoint – requires Bearer token from /auth/login.
+    Supports `If-None-Match`; the ETag is derived from the claims.
     ---
     tags:
       - Session
@@ -172,9 +240,11 @@ def me():
         description: Decoded token claims.
         schema:
           $ref: '#/definitions/ClaimsResponse'
+      304:
+        description: Claims unchanged since the `If-None-Match` ETag.
       401:
         description: Missing or invalid token.
         schema:
           $ref: '#/definitions/ErrorResponse'
     """
-    return jsonify({"claims": request.claims})
+    return conditional_json({"claims": request.claims})
@@ -1,15 +1,72 @@
-"""Google social login via Cognito hosted UI."""
+"""Social (federated) login via Cognito hosted UI."""
 
+from functools import lru_cache
 from urllib.parse import urlencode
 
-import requests
 from flask import Blueprint, jsonify, redirect, request, url_for
 
+from .. import sessions
+from ..cognito import exchange_code, get_oidc_config, verify_jwt
 from ..config import settings
 
 
 bp = Blueprint("social", __name__)
 
+# URL slug -> Cognito identity provider name, e.g. "google" -> "Google"
+PROVIDERS = {
+    name.strip().lower(): name.strip()
+    for name in (settings.social_providers or "").split(",")
+    if name.strip()
+}
+PROVIDERS.setdefault("google", "Google")
+
+
+@lru_cache(maxsize=256)
+def authorize_url(provider: str, redirect_uri: str) -> str:
+    """Hosted UI authorize URL, built once per provider and redirect URI."""
+
+    params = {
+        "client_id": settings.client_id,
+        "response_type": "code",
+        "scope": "openid email",
+        "redirect_uri": redirect_uri,
+        "identity_provider": provider,
+    }
+    return f"{get_oidc_config()['authorization_endpoint']}?{urlencode(params)}"
+
+
+def _finish_login(redirect_uri: str):
+    error = request.args.get("error")
+    error_description = request.args.get("error_description")
+    if error:
+        return jsonify({"error": error, "error_description": error_description}), 400
+
+    code = request.args.get("code")
+    if not code:
+        return jsonify({"error": "Missing code parameter"}), 400
+
+    resp = exchange_code(code, redirect_uri)
+    if not resp.ok:
+        return jsonify({"error": "Token exchange failed", "details": resp.text}), 400
+
+    tokens = resp.json()
+    try:
+        claims = verify_jwt(tokens.get("id_token") or "")
+    except Exception as exc:
+        return jsonify({"error": f"Invalid id_token: {exc}"}), 400
+
+    if sessions.manager:
+        return sessions.start_session(tokens, claims.get("cognito:username") or claims["sub"])
+
+    return jsonify({
+        "access_token": tokens.get("access_token"),
+        "id_token": tokens.get("id_token"),
+        "refresh_token": tokens.get("refresh_token"),
+        "expires_in": tokens.get("expires_in"),
+        "token_type": tokens.get("token_type"),
+        "claims": claims,
+    })
+
 
 @bp.route("/auth/google/start", methods=["GET"])
 def google_start():
@@ -33,16 +90,7 @@ def google_start():
           $ref: '#/definitions/ErrorResponse'
     """
     redirect_uri = url_for("social.google_callback", _external=True)
-
-    params = {
-        "client_id": settings.client_id,
-        "response_type": "code",
-        "scope": "openid email",
-        "redirect_uri": redirect_uri,
-        "identity_provider": "Google",
-    }
-    url = f"{settings.cognito_domain}/oauth2/authorize?{urlencode(params)}"
-    return redirect(url)
+    return redirect(authorize_url("Google", redirect_uri))
 
 
 @bp.route("/auth/google/callback", methods=["GET"])
@@ -73,44 +121,94 @@ def google_callback():
         description: Human description for the OAuth error.
     responses:
       200:
-        description: Cognito tokens for the Google-authenticated user.
+        description: Cognito tokens for the Google-authenticated user, with the verified `id_token` claims.
         schema:
-          $ref: '#/definitions/TokenResponse'
+          $ref: '#/definitions/SocialTokenResponse'
       400:
-        description: Error after redirect or missing/invalid `code`.
+        description: Error after redirect, missing/invalid `code` or an `id_token` that fails verification.
         schema:
           $ref: '#/definitions/OAuthErrorResponse'
     """
-    error = request.args.get("error")
-    error_description = request.args.get("error_description")
-    if error:
-        return jsonify({"error": error, "error_description": error_description}), 400
+    return _finish_login(url_for("social.google_callback", _external=True))
 
-    code = request.args.get("code")
-    if not code:
-        return jsonify({"error": "Missing code parameter"}), 400
 
-    redirect_uri = url_for("social.google_callback", _external=True)
+@bp.route("/auth/<provider>/start", methods=["GET"])
+def provider_start(provider):
+    """
+    Kick off sign-in with any identity provider listed in `SOCIAL_PROVIDERS`.
+    ---
+    tags:
+      - Social
+    produces:
+      - application/json
+    parameters:
+      - in: path
+        name: provider
+        type: string
+        required: true
+        description: Lower-cased Cognito identity provider name, e.g. `facebook` or `signinwithapple`.
+    responses:
+      302:
+        description: Redirect to Cognito `/oauth2/authorize` with the selected IdP.
+        headers:
+          Location:
+            type: string
+            description: URL for Cognito hosted UI where the user completes login.
+      404:
+        description: Provider is not configured.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    name = PROVIDERS.get(provider)
+    if name is None:
+        return jsonify({"error": f"Unknown identity provider: {provider}"}), 404
 
-    token_url = f"{settings.cognito_domain}/oauth2/token"
-    data = {
-        "grant_type": "authorization_code",
-        "code": code,
-        "client_id": settings.client_id,
-        "client_secret": settings.client_secret,
-        "redirect_uri": redirect_uri,
-    }
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    redirect_uri = url_for("social.provider_callback", provider=provider, _external=True)
+    return redirect(authorize_url(name, redirect_uri))
 
-    resp = requests.post(token_url, data=data, headers=headers, timeout=10)
-    if not resp.ok:
-        return jsonify({"error": "Token exchange failed", "details": resp.text}), 400
 
-    tokens = resp.json()
-    return jsonify({
-        "access_token": tokens.get("access_token"),
-        "id_token": tokens.get("id_token"),
-        "refresh_token": tokens.get("refresh_token"),
-        "expires_in": tokens.get("expires_in"),
-        "token_type": tokens.get("token_type"),
-    })
+@bp.route("/auth/<provider>/callback", methods=["GET"])
+def provider_callback(provider):
+    """
+    Handle OAuth2 callback from Cognito after login with a configured IdP.
+    ---
+    tags:
+      - Social
+    produces:
+      - application/json
+    parameters:
+      - in: path
+        name: provider
+        type: string
+        required: true
+        description: Same provider slug used for `/auth/{provider}/start`.
+      - in: query
+        name: code
+        type: string
+        description: Authorization code to exchange for Cognito tokens.
+      - in: query
+        name: error
+        type: string
+        description: Error returned by Cognito/the IdP when consent fails.
+      - in: query
+        name: error_description
+        type: string
+        description: Human description for the OAuth error.
+    responses:
+      200:
+        description: Cognito tokens with the verified `id_token` claims.
+        schema:
+          $ref: '#/definitions/SocialTokenResponse'
+      400:
+        description: Error after redirect, missing/invalid `code` or an `id_token` that fails verification.
+        schema:
+          $ref: '#/definitions/OAuthErrorResponse'
+      404:
+        description: Provider is not configured.
+        schema:
+          $ref: '#/definitions/ErrorResponse'
+    """
+    if provider not in PROVIDERS:
+        return jsonify({"error": f"Unknown identity provider: {provider}"}), 404
+
+    return _finish_login(url_for("social.provider_callback", provider=provider, _external=True))
@@ -0,0 +1,262 @@
+"""Optional server-side sessions.
+
+With ``SESSION_STORE`` set, login, refresh and the social callback keep the
+Cognito tokens server side and hand the client a short opaque session ID in
+a cookie. ``require_bearer_token`` resolves that ID straight to the claims
+that were verified when the session was created, and tokens are refreshed in
+the background once a session is used within ``SESSION_REFRESH_MARGIN``
+seconds of its access token expiring.
+
+Stores only see ``sha256(session_id)``, so a leaked store cannot be replayed
+as cookies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from flask import jsonify, request
+
+from .cache import TTLCache, shared_backend
+from .cognito import cognito, error_status, get_secret_hash, verify_jwt
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+
+class MemorySessionStore(TTLCache):
+    """Bounded in-process LRU; sessions are lost on restart."""
+
+    def put(self, key: str, record: Record, ttl: int) -> None:
+        self.set(key, record, ttl)
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file; survives restarts of a single host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "key TEXT PRIMARY KEY, record TEXT NOT NULL, deadline REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_deadline ON sessions (deadline)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Record]:
+        row = self._connect().execute(
+            "SELECT record FROM sessions WHERE key = ? AND deadline >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, record: Record, ttl: int) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (key, record, deadline) VALUES (?, ?, ?)",
+            (key, json.dumps(record, separators=(",", ":")), time.time() + ttl),
+        )
+        conn.execute("DELETE FROM sessions WHERE deadline < ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+
+class SharedSessionStore:
+    """Sessions in a shared key/value service such as Redis.
+
+    ``backend`` needs ``get``, ``set(key, value, ex=ttl)`` and ``delete``;
+    any redis-py client qualifies, and ``LocalKeyValue`` stands in for one
+    in development.
+    """
+
+    prefix = "session:"
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key: str) -> Optional[Record]:
+        raw = self.backend.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def put(self, key: str, record: Record, ttl: int) -> None:
+        self.backend.set(self.prefix + key, json.dumps(record, separators=(",", ":")).encode("utf-8"), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(self.prefix + key)
+
+
+def build_store(kind: str):
+    if kind == "memory":
+        return MemorySessionStore(settings.session_max_entries)
+    if kind == "sqlite":
+        return SQLiteSessionStore(settings.session_sqlite_path)
+    if kind == "shared":
+        return SharedSessionStore(shared_backend(settings.session_shared_url, "SESSION_SHARED_URL"))
+    raise RuntimeError(f"Unknown SESSION_STORE {kind!r}; expected memory, sqlite or shared")
+
+
+def _key(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+
+class SessionManager:
+    """Creates, resolves and refreshes sessions on top of a store."""
+
+    def __init__(self, store, ttl: int, refresh_margin: int):
+        self.store = store
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._refreshing: set[str] = set()
+        self._refreshing_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="session-refresh")
+
+    def create(self, tokens: Dict[str, Any], username: str) -> tuple[str, Record]:
+        """Verify ``tokens`` once and store them under a new session ID."""
+
+        claims = verify_jwt(tokens["id_token"])
+        record = {
+            "access_token": tokens["access_token"],
+            "id_token": tokens["id_token"],
+            "refresh_token": tokens.get("refresh_token"),
+            "username": claims.get("cognito:username") or username,
+            "claims": claims,
+            "expires_at": time.time() + int(tokens.get("expires_in") or 3600),
+        }
+        session_id = secrets.token_urlsafe(24)
+        self.store.put(_key(session_id), record, self.ttl)
+        return session_id, record
+
+    def resolve(self, session_id: str) -> Optional[Record]:
+        key = _key(session_id)
+        record = self.store.get(key)
+        if record is None:
+            return None
+
+        remaining = record["expires_at"] - time.time()
+        if remaining <= 0:
+            return self._refresh(key, record)
+        if remaining < self.refresh_margin:
+            self._schedule_refresh(key, record)
+        return record
+
+    def refresh(self, session_id: str) -> Optional[Record]:
+        key = _key(session_id)
+        record = self.store.get(key)
+        return self._refresh(key, record) if record else None
+
+    def revoke(self, session_id: str) -> None:
+        self.store.delete(_key(session_id))
+
+    def _schedule_refresh(self, key: str, record: Record) -> None:
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, record)
+
+    def _refresh(self, key: str, record: Record) -> Optional[Record]:
+        try:
+            if not record.get("refresh_token"):
+                return None
+            try:
+                resp = cognito.initiate_auth(
+                    ClientId=settings.client_id,
+                    AuthFlow="REFRESH_TOKEN_AUTH",
+                    AuthParameters={
+                        "REFRESH_TOKEN": record["refresh_token"],
+                        "SECRET_HASH": get_secret_hash(record["username"]),
+                    },
+                )
+            except cognito.exceptions.NotAuthorizedException:
+                self.store.delete(key)
+                return None
+
+            result = resp.get("AuthenticationResult", {})
+            record = dict(
+                record,
+                access_token=result["AccessToken"],
+                id_token=result["IdToken"],
+                refresh_token=result.get("RefreshToken") or record["refresh_token"],
+                claims=verify_jwt(result["IdToken"]),
+                expires_at=time.time() + int(result.get("ExpiresIn") or 3600),
+            )
+            self.store.put(key, record, self.ttl)
+            return record
+        finally:
+            with self._refreshing_lock:
+                self._refreshing.discard(key)
+
+
+manager: Optional[SessionManager] = (
+    SessionManager(build_store(settings.session_store), settings.session_ttl, settings.session_refresh_margin)
+    if settings.session_store
+    else None
+)
+
+
+def current_session_id() -> Optional[str]:
+    return request.cookies.get(settings.session_cookie)
+
+
+def set_session_cookie(response, session_id: str):
+    response.set_cookie(
+        settings.session_cookie,
+        session_id,
+        max_age=settings.session_ttl,
+        httponly=True,
+        secure=request.scheme == "https",
+        samesite="Lax",
+    )
+    return response
+
+
+def session_response(session_id: str, record: Record, message: str):
+    """JSON body for session mode: the tokens stay server side."""
+
+    response = jsonify({
+        "message": message,
+        "expires_in": max(0, int(record["expires_at"] - time.time())),
+        "token_type": "Session",
+    })
+    return set_session_cookie(response, session_id)
+
+
+def refresh_failed(exc: Exception):
+    """Response for a refresh that failed for a reason other than a revoked token.
+
+    The session itself is still valid, so this is a 429 or 503 the client can
+    retry, never a 401 that would log the user out. Cognito's error text is
+    logged, not returned.
+    """
+
+    logger.warning("Session refresh failed: %s", exc)
+    status = error_status(exc)
+    if status == 400:
+        status = 503
+    return jsonify({"error": "Could not refresh the session; retry later"}), status
+
+
+def start_session(tokens: Dict[str, Any], username: str):
+    session_id, record = manager.create(tokens, username)
+    return session_response(session_id, record, "Session started")
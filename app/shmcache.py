@@ -0,0 +1,287 @@
+"""Shared-memory cache for the worker processes on one host.
+
+With ``SHARED_CACHE`` set to a file path (``/dev/shm/...`` keeps it in
+RAM), the JWKS document, verified tokens and ``/auth/check`` decisions live
+in one memory-mapped table that every worker maps, so a token verified or a
+key set fetched by one worker is warm in all of them.
+
+The table is a fixed-size open-addressing hash table: ``slots`` slots of
+``slot_size`` bytes, each looked up in a window of ``PROBE`` slots from the
+key's hash. A slot holds a 16-byte BLAKE2b digest of the key (raw tokens
+never reach shared memory), an expiry and the JSON-encoded value. Readers
+take no lock: every slot carries a sequence number that writers make odd
+while they write, and a reader that sees it odd or changed treats the slot
+as a miss. Writers serialize on a ``lockf`` lock over the file, which is
+per process and so also holds between workers forked from one master.
+
+Whoever can write the file can plant "verified" claims, so it is opened
+without following symlinks and rejected unless this user owns it with
+mode 0600. Its name carries the layout (``<SHARED_CACHE>.<slots>x<size>``)
+and an existing file is never resized: readers hold no lock, and shrinking
+a file another worker has mapped would crash it.
+When a window is full the entry closest to expiry is replaced; values that
+do not fit in a slot are simply not cached.
+
+A shared lookup (hash, probe, copy, JSON decode) costs several microseconds
+against well under one for ``TTLCache``, so ``ttl_cache`` puts a per-process
+``TTLCache`` in front of the table: the table saves the work another worker
+already did, the local cache keeps repeated hits cheap.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Hashable, Optional, Tuple
+
+from .cache import TTLCache
+from .config import settings
+
+
+MAGIC = b"CAKSHM01"
+PROBE = 8
+
+_FILE_HEADER = struct.Struct("<8sII")  # magic, slots, slot_size
+# seq, namespace tag, key digest, expires (epoch seconds), value length
+_SLOT_HEADER = struct.Struct("<II16sdI")
+_SEQ = struct.Struct("<I")
+_HEADER_SIZE = 64
+
+
+class SharedTable:
+    """Fixed-size hash table in a shared ``mmap`` of ``path``."""
+
+    def __init__(self, path: str, slots: int = 8192, slot_size: int = 2048):
+        # The layout is part of the file name, so a process started with other
+        # settings maps a file of its own instead of resizing one in use
+        self.path = f"{path}.{slots}x{slot_size}"
+        self.slots = slots
+        self.slot_size = slot_size
+        self.capacity = slot_size - _SLOT_HEADER.size
+        self._lock = threading.Lock()  # lockf does not exclude threads of one process
+
+        size = _HEADER_SIZE + slots * slot_size
+        header = _FILE_HEADER.pack(MAGIC, slots, slot_size)
+        self._create(size, header)
+        try:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_NOFOLLOW | os.O_CLOEXEC)
+        except OSError as exc:
+            raise RuntimeError(f"Cannot open SHARED_CACHE {self.path!r}: {exc}") from exc
+        try:
+            self._check(size, header)
+            self._mm = mmap.mmap(self._fd, size)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    def _create(self, size: int, header: bytes) -> None:
+        """Create the file fully laid out, unless it exists; never touches an existing file."""
+
+        if os.path.lexists(self.path):
+            return
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        try:
+            os.ftruncate(fd, size)
+            os.pwrite(fd, header, 0)
+            os.fsync(fd)
+            os.link(tmp, self.path)  # fails if another worker got there first; theirs is kept
+        except FileExistsError:
+            pass
+        finally:
+            os.close(fd)
+            os.unlink(tmp)
+
+    def _check(self, size: int, header: bytes) -> None:
+        """Refuse a file another user could write to (forged claims) or one laid out differently."""
+
+        st = os.fstat(self._fd)
+        if not stat.S_ISREG(st.st_mode):
+            raise RuntimeError(f"SHARED_CACHE {self.path!r} is not a regular file")
+        if st.st_uid != os.geteuid() or st.st_mode & 0o077:
+            raise RuntimeError(
+                f"SHARED_CACHE {self.path!r} must be owned by uid {os.geteuid()} with mode 0600; "
+                f"found uid {st.st_uid}, mode {stat.S_IMODE(st.st_mode):o}"
+            )
+        if st.st_size != size or os.pread(self._fd, _FILE_HEADER.size, 0) != header:
+            raise RuntimeError(f"SHARED_CACHE {self.path!r} has an unexpected layout; remove it and restart")
+
+    def _offsets(self, digest: bytes):
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        for i in range(min(PROBE, self.slots)):
+            yield _HEADER_SIZE + ((start + i) % self.slots) * self.slot_size
+
+    def get(self, tag: int, digest: bytes) -> Optional[Tuple[bytes, float]]:
+        """The value and its expiry (epoch seconds), or None."""
+
+        mm = self._mm
+        for offset in self._offsets(digest):
+            seq, slot_tag, slot_digest, expires, length = _SLOT_HEADER.unpack_from(mm, offset)
+            if slot_digest != digest or slot_tag != tag or seq & 1:
+                continue
+            start = offset + _SLOT_HEADER.size
+            value = mm[start:start + length]
+            if _SEQ.unpack_from(mm, offset)[0] != seq:
+                return None  # rewritten while we read it
+            return (value, expires) if expires > time.time() else None
+        return None
+
+    def set(self, tag: int, digest: bytes, value: bytes, ttl: float, replace: bool = True) -> bool:
+        """Store ``value``; with ``replace=False`` only if the key has no live entry."""
+
+        if len(value) > self.capacity:
+            return False
+        now = time.time()
+        with self._write_lock():
+            mm = self._mm
+            target, soonest = None, None
+            for offset in self._offsets(digest):
+                _, slot_tag, slot_digest, expires, _ = _SLOT_HEADER.unpack_from(mm, offset)
+                if slot_digest == digest and slot_tag == tag:
+                    if not replace and expires > now:
+                        return False
+                    target = offset
+                    break
+                if expires <= now and target is None:
+                    target = offset  # keep looking: the key may sit further along
+                    continue
+                if soonest is None or expires < soonest[0]:
+                    soonest = (expires, offset)
+            if target is None:
+                target = soonest[1]
+            self._write(target, tag, digest, now + ttl, value)
+        return True
+
+    def delete(self, tag: int, digest: bytes) -> None:
+        with self._write_lock():
+            for offset in self._offsets(digest):
+                _, slot_tag, slot_digest, _, _ = _SLOT_HEADER.unpack_from(self._mm, offset)
+                if slot_digest == digest and slot_tag == tag:
+                    self._write(offset, 0, bytes(16), 0.0, b"")
+
+    def clear(self, tag: int) -> None:
+        with self._write_lock():
+            for index in range(self.slots):
+                offset = _HEADER_SIZE + index * self.slot_size
+                if _SLOT_HEADER.unpack_from(self._mm, offset)[1] == tag:
+                    self._write(offset, 0, bytes(16), 0.0, b"")
+
+    def count(self, tag: int) -> int:
+        now = time.time()
+        live = 0
+        for index in range(self.slots):
+            _, slot_tag, _, expires, _ = _SLOT_HEADER.unpack_from(self._mm, _HEADER_SIZE + index * self.slot_size)
+            live += slot_tag == tag and expires > now
+        return live
+
+    def _write(self, offset: int, tag: int, digest: bytes, expires: float, value: bytes) -> None:
+        mm = self._mm
+        seq = _SEQ.unpack_from(mm, offset)[0]
+        _SEQ.pack_into(mm, offset, (seq + 1) & 0xFFFFFFFF)  # odd: readers skip the slot
+        start = offset + _SLOT_HEADER.size
+        mm[start:start + len(value)] = value
+        _SLOT_HEADER.pack_into(mm, offset, (seq + 1) & 0xFFFFFFFF, tag, digest, expires, len(value))
+        _SEQ.pack_into(mm, offset, (seq + 2) & 0xFFFFFFFF)
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class SharedTTLCache:
+    """``TTLCache``'s interface over one namespace of a ``SharedTable``.
+
+    Values go through JSON, so tuples come back as lists. With
+    ``local_entries`` a per-process ``TTLCache`` answers repeated lookups;
+    ``delete`` and ``clear`` then only reach other workers' local copies
+    when those expire.
+    """
+
+    def __init__(self, table: SharedTable, namespace: str, ttl: float = 60.0, local_entries: int = 0):
+        self.table = table
+        self.namespace = namespace
+        self.ttl = ttl
+        self._tag = zlib.crc32(namespace.encode())
+        self._prefix = namespace.encode() + b"\0"
+        self._local = TTLCache(max_entries=local_entries, ttl=ttl) if local_entries else None
+
+    def _digest(self, key: Hashable) -> bytes:
+        raw = key if isinstance(key, bytes) else str(key).encode()
+        return hashlib.blake2b(self._prefix + raw, digest_size=16).digest()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if self._local is not None:
+            value = self._local.get(key)
+            if value is not None:
+                return value
+        found = self.table.get(self._tag, self._digest(key))
+        if found is None:
+            return None
+        value = json.loads(found[0])
+        if self._local is not None:
+            self._local.set(key, value, found[1] - time.time())
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._store(key, value, ttl, replace=True)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store ``value`` unless ``key`` is already live in the table."""
+
+        return self._store(key, value, ttl, replace=False)
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float], replace: bool) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        encoded = json.dumps(value, separators=(",", ":")).encode()
+        stored = self.table.set(self._tag, self._digest(key), encoded, ttl, replace)
+        if stored and self._local is not None:
+            self._local.set(key, json.loads(encoded), ttl)  # same shape as other workers see
+        return stored
+
+    def delete(self, key: Hashable) -> None:
+        if self._local is not None:
+            self._local.delete(key)
+        self.table.delete(self._tag, self._digest(key))
+
+    def clear(self) -> None:
+        if self._local is not None:
+            self._local.clear()
+        self.table.clear(self._tag)
+
+    def __len__(self) -> int:
+        return self.table.count(self._tag)
+
+
+def build_table() -> Optional[SharedTable]:
+    if not settings.shared_cache:
+        return None
+    return SharedTable(settings.shared_cache, settings.shared_cache_slots, settings.shared_cache_slot_size)
+
+
+table = build_table()
+
+
+def ttl_cache(namespace: str, max_entries: int, ttl: float, local: bool = True):
+    """A cache shared by all workers when ``SHARED_CACHE`` is set, else a per-process ``TTLCache``.
+
+    Pass ``local=False`` for caches whose ``delete`` must reach every worker
+    at once; lookups then always read the shared table.
+    """
+
+    if table is None:
+        return TTLCache(max_entries=max_entries, ttl=ttl)
+    return SharedTTLCache(table, namespace, ttl, local_entries=max_entries if local else 0)
@@ -32,9 +32,21 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                 "name": "Password",
                 "description": "Password recovery and reset endpoints",
             },
+            {
+                "name": "Batch",
+                "description": "Several API calls in one round trip",
+            },
+            {
+                "name": "Gateway",
+                "description": "Subrequest authorization for reverse proxies",
+            },
+            {
+                "name": "Operations",
+                "description": "Metrics for operating the service",
+            },
             {
                 "name": "Social",
-                "description": "Federated login via Google using Cognito hosted UI",
+                "description": "Federated login via Google or other IdPs using Cognito hosted UI",
             },
         ],
         "securityDefinitions": {
@@ -53,8 +65,8 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                 "type": "object",
                 "required": ["email", "password"],
                 "properties": {
-                    "email": {"type": "string", "example": "new.user@example.com"},
-                    "password": {"type": "string", "example": "Str0ngP@ssw0rd!"},
+                    "email": {"type": "string", "format": "email", "example": "new.user@example.com"},
+                    "password": {"type": "string", "minLength": 1, "example": "Str0ngP@ssw0rd!"},
                 },
             },
             "SignupResponse": {
@@ -99,7 +111,24 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                     "attributes": {
                         "type": "object",
                         "additionalProperties": {"type": "string"},
-                    }
+                    },
+                    "groups": {"type": "array", "items": {"type": "string"}},
+                    "devices": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "key": {"type": "string"},
+                                "attributes": {"type": "object", "additionalProperties": {"type": "string"}},
+                                "last_authenticated": {"type": "string", "format": "date-time"},
+                            },
+                        },
+                    },
+                    "errors": {
+                        "type": "object",
+                        "description": "Parts that could not be fetched, with the reason",
+                        "additionalProperties": {"type": "string"},
+                    },
                 },
                 "example": {
                     "attributes": {
@@ -115,16 +144,16 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                 "type": "object",
                 "required": ["email", "code"],
                 "properties": {
-                    "email": {"type": "string", "example": "new.user@example.com"},
-                    "code": {"type": "string", "example": "123456"},
+                    "email": {"type": "string", "format": "email", "example": "new.user@example.com"},
+                    "code": {"type": "string", "minLength": 1, "example": "123456"},
                 },
             },
             "LoginRequest": {
                 "type": "object",
                 "required": ["email", "password"],
                 "properties": {
-                    "email": {"type": "string", "example": "new.user@example.com"},
-                    "password": {"type": "string", "example": "Str0ngP@ssw0rd!"},
+                    "email": {"type": "string", "format": "email", "example": "new.user@example.com"},
+                    "password": {"type": "string", "minLength": 1, "example": "Str0ngP@ssw0rd!"},
                 },
             },
             "TokenResponse": {
@@ -144,19 +173,56 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                     "token_type": "Bearer",
                 },
             },
+            "SocialTokenResponse": {
+                "type": "object",
+                "properties": {
+                    "access_token": {"type": "string"},
+                    "id_token": {"type": "string"},
+                    "refresh_token": {"type": "string"},
+                    "expires_in": {"type": "integer"},
+                    "token_type": {"type": "string", "example": "Bearer"},
+                    "claims": {"type": "object"},
+                },
+                "example": {
+                    "access_token": "<ACCESS_TOKEN>",
+                    "id_token": "<ID_TOKEN>",
+                    "refresh_token": "<REFRESH_TOKEN>",
+                    "expires_in": 3600,
+                    "token_type": "Bearer",
+                    "claims": {
+                        "aud": settings.client_id,
+                        "email": "new.user@example.com",
+                        "token_use": "id",
+                        "identities": [{"providerName": "Google"}],
+                    },
+                },
+            },
+            "SessionResponse": {
+                "type": "object",
+                "properties": {
+                    "message": {"type": "string"},
+                    "expires_in": {"type": "integer"},
+                    "token_type": {"type": "string", "example": "Session"},
+                },
+                "example": {
+                    "message": "Session started",
+                    "expires_in": 3600,
+                    "token_type": "Session",
+                },
+            },
             "RefreshRequest": {
                 "type": "object",
                 "required": ["email", "refresh_token"],
                 "properties": {
-                    "email": {"type": "string", "example": "new.user@example.com"},
-                    "refresh_token": {"type": "string", "example": "<REFRESH_TOKEN>"},
+                    "email": {"type": "string", "minLength": 1, "example": "new.user@example.com"},
+                    "refresh_token": {"type": "string", "minLength": 1, "example": "<REFRESH_TOKEN>"},
                 },
             },
             "ForgotPasswordRequest": {
                 "type": "object",
                 "required": ["email"],
                 "properties": {
-                    "email": {"type": "string", "example": "new.user@example.com"},
+                    "email": {"type": "string", "format": "email", "example": "new.user@example.com"},
                 },
             },
             "ForgotPasswordResponse": {
@@ -178,9 +244,9 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                 "type": "object",
                 "required": ["email", "code", "new_password"],
                 "properties": {
-                    "email": {"type": "string"},
-                    "code": {"type": "string", "example": "123456"},
-                    "new_password": {"type": "string", "example": "EvenStrongerP@ss1"},
+                    "email": {"type": "string", "format": "email"},
+                    "code": {"type": "string", "minLength": 1, "example": "123456"},
+                    "new_password": {"type": "string", "minLength": 1, "example": "EvenStrongerP@ss1"},
                 },
             },
             "ClaimsResponse": {
@@ -210,6 +276,69 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                 },
                 "example": {"error": "email and password required"},
             },
+            "ValidationErrorResponse": {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string"},
+                    "fields": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "field": {"type": "string"},
+                                "message": {"type": "string"},
+                            },
+                        },
+                    },
+                },
+                "example": {
+                    "error": "Invalid request body",
+                    "fields": [{"field": "email", "message": "'not-an-email' is not a 'email'"}],
+                },
+            },
+            "JobAcceptedResponse": {
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "string"},
+                    "state": {"type": "string", "example": "queued"},
+                    "status_url": {"type": "string"},
+                },
+                "example": {
+                    "job_id": "mX3kq1m0n8hZ1w2y3Q4rTg",
+                    "state": "queued",
+                    "status_url": "/auth/jobs/mX3kq1m0n8hZ1w2y3Q4rTg",
+                },
+            },
+            "JobStatusResponse": {
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "string"},
+                    "state": {"type": "string", "enum": ["queued", "running", "succeeded", "failed"]},
+                    "status": {"type": "integer"},
+                    "result": {"type": "object"},
+                },
+                "example": {
+                    "job_id": "mX3kq1m0n8hZ1w2y3Q4rTg",
+                    "state": "succeeded",
+                    "status": 200,
+                    "result": {
+                        "message": "If the account exists, a reset code has been sent",
+                        "codeDelivery": {
+                            "AttributeName": "email",
+                            "DeliveryMedium": "EMAIL",
+                            "Destination": "n***@example.com",
+                        },
+                    },
+                },
+            },
+            "MetricsResponse": {
+                "type": "object",
+                "additionalProperties": {},
+                "example": {
+                    "jobs.queue_depth": 0,
+                    "jobs.run_ms": {"count": 12, "mean_ms": 180.2, "max_ms": 410.0, "p50_ms": 160.5, "p99_ms": 410.0},
+                },
+            },
             "OAuthErrorResponse": {
                 "type": "object",
                 "properties": {
@@ -221,5 +350,77 @@ def build_swagger_template(settings) -> Dict[str, Any]:
                     "error_description": "User closed Google consent screen",
                 },
             },
+            "BatchStep": {
+                "type": "object",
+                "required": ["id", "path"],
+                "properties": {
+                    "id": {"type": "string", "pattern": "^[A-Za-z0-9_-]+$", "example": "login"},
+                    "method": {
+                        "type": "string",
+                        "enum": ["GET", "POST", "PUT", "PATCH", "DELETE"],
+                        "default": "GET",
+                    },
+                    "path": {"type": "string", "pattern": "^/", "example": "/auth/login"},
+                    "headers": {"type": "object", "additionalProperties": {"type": "string"}},
+                    "body": {"description": "JSON body, sent with `Content-Type: application/json`."},
+                    "depends_on": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Earlier steps to wait for besides those referenced with `{{id.field}}`.",
+                    },
+                },
+            },
+            "BatchRequest": {
+                "type": "object",
+                "required": ["steps"],
+                "properties": {
+                    "steps": {
+                        "type": "array",
+                        "minItems": 1,
+                        "maxItems": settings.batch_max_steps,
+                        "items": {"$ref": "#/definitions/BatchStep"},
+                    },
+                },
+                "example": {
+                    "steps": [
+                        {
+                            "id": "login",
+                            "method": "POST",
+                            "path": "/auth/login",
+                            "body": {"email": "new.user@example.com", "password": "Str0ngP@ssw0rd!"},
+                        },
+                        {
+                            "id": "profile",
+                            "path": "/profile",
+                            "headers": {"Authorization": "Bearer {{login.access_token}}"},
+                        },
+                        {"id": "me", "path": "/me", "headers": {"Authorization": "Bearer {{login.id_token}}"}},
+                    ]
+                },
+            },
+            "BatchResponse": {
+                "type": "object",
+                "properties": {
+                    "results": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string"},
+                                "status": {"type": "integer"},
+                                "headers": {"type": "object"},
+                                "body": {},
+                            },
+                        },
+                    },
+                },
+                "example": {
+                    "results": [
+                        {"id": "login", "status": 200, "headers": {}, "body": {"access_token": "<ACCESS_TOKEN>"}},
+                        {"id": "profile", "status": 200, "headers": {"ETag": "\"5d41402a\""}, "body": {"sub": "..."}},
+                        {"id": "me", "status": 424, "headers": {}, "body": {"error": "Step 'login' failed"}},
+                    ]
+                },
+            },
         },
     }
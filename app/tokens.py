@@ -0,0 +1,154 @@
+"""Token verification against the user pool's signing keys.
+
+Kept free of Flask, boto3 and requests so entry points that only verify
+tokens (``authorizer.py``) import nothing else; ``app.cognito`` re-exports
+everything here.
+
+Verified claims are cached for ``TOKEN_CACHE_TTL`` seconds (never past the
+token's ``exp``) under a digest of the token. With ``SHARED_CACHE`` set that
+cache and the JWKS document are shared by all workers on the host.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, Optional
+
+import jwt
+from jwt.algorithms import RSAAlgorithm
+
+from . import shmcache
+from .config import settings
+from .metrics import registry
+
+
+ISSUER = f"https://cognito-idp.{settings.cognito_region}.amazonaws.com/{settings.user_pool_id}"
+JWKS_URL = f"{ISSUER}/.well-known/jwks.json"
+# Seconds a JWKS document fetched by one worker serves workers that start later
+SHARED_JWKS_TTL = 3600
+# Longest a worker waits for a sibling's JWKS fetch before fetching itself
+SHARED_FETCH_WAIT = 10.0
+
+
+def fetch_json(url: str, timeout: float = 10) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+class KeyStore:
+    """Signing keys for the user pool, parsed once and indexed by ``kid``.
+
+    An unknown ``kid`` triggers a refetch so key rotation is picked up, but
+    at most once per ``min_refresh_interval`` seconds so tokens carrying
+    made-up ``kid`` values cannot hammer the JWKS endpoint. With a ``shared``
+    cache a document another worker fetched is used instead of fetching, and
+    the interval applies to the whole host.
+    """
+
+    def __init__(self, url: str, min_refresh_interval: float = 60.0, shared=None):
+        self.url = url
+        self.min_refresh_interval = min_refresh_interval
+        self.shared = shared
+        self._jwks: Dict[str, Any] | None = None
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetches = registry.counter("jwks.fetches")
+
+    def jwks(self) -> Dict[str, Any]:
+        if self._jwks is None:
+            self.refresh()
+        return self._jwks
+
+    def refresh(self) -> None:
+        with self._lock:
+            if self._jwks is not None and time.time() - self._fetched_at < self.min_refresh_interval:
+                return
+            if self.shared is not None and self._load_shared():
+                return
+            self._fetches.inc()
+            self.load(fetch_json(self.url))
+            if self.shared is not None:
+                self.shared.set(self.url, {"jwks": self._jwks, "fetched_at": self._fetched_at}, SHARED_JWKS_TTL)
+
+    def _load_shared(self) -> bool:
+        """Take a document a sibling worker fetched recently, waiting if one is fetching now."""
+
+        deadline = time.monotonic() + SHARED_FETCH_WAIT
+        while True:
+            entry = self.shared.get(self.url)
+            if entry and entry["fetched_at"] > self._fetched_at:
+                self.load(entry["jwks"], entry["fetched_at"])
+                if time.time() - self._fetched_at < self.min_refresh_interval:
+                    return True
+            if self.shared.add(f"{self.url}#fetching", 1, SHARED_FETCH_WAIT) or time.monotonic() > deadline:
+                return False  # this worker fetches
+            time.sleep(0.02)
+
+    def load(self, jwks: Dict[str, Any], fetched_at: Optional[float] = None) -> None:
+        """Install an already-fetched JWKS document."""
+
+        keys = {k["kid"]: RSAAlgorithm.from_jwk(json.dumps(k)) for k in jwks.get("keys", [])}
+        self._jwks, self._keys = jwks, keys
+        self._fetched_at = time.time() if fetched_at is None else fetched_at
+
+    def get(self, kid: str):
+        key = self._keys.get(kid)
+        if key is None:
+            self.refresh()
+            key = self._keys.get(kid)
+            if key is None:
+                raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+        return key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jwks, self._keys, self._fetched_at = None, {}, 0.0
+
+
+key_store = KeyStore(
+    JWKS_URL, shared=shmcache.SharedTTLCache(shmcache.table, "jwks", SHARED_JWKS_TTL) if shmcache.table else None
+)
+
+# digest of the token -> verified claims
+verified = shmcache.ttl_cache("tokens", settings.token_cache_max_entries, settings.token_cache_ttl)
+_hits = registry.counter("tokens.cache_hits")
+_misses = registry.counter("tokens.cache_misses")
+registry.gauge("tokens.cached", lambda: len(verified))
+
+
+def token_digest(token: str) -> bytes:
+    """Cache key for ``token``, so caches do not hold raw tokens."""
+
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def verify_jwt(token: str) -> Dict[str, Any]:
+    """Verify an ID or access token from this user pool."""
+
+    key = token_digest(token)
+    claims = verified.get(key)
+    now = time.time()
+    if claims is not None and claims.get("exp", 0) > now:
+        _hits.inc()
+        return dict(claims)
+
+    _misses.inc()
+    headers = jwt.get_unverified_header(token)
+    public_key = key_store.get(headers["kid"])
+
+    claims = jwt.decode(
+        token,
+        public_key,
+        algorithms=["RS256"],
+        audience=settings.client_id,
+        issuer=ISSUER,
+    )
+    ttl = min(settings.token_cache_ttl, claims.get("exp", 0) - now)
+    if ttl > 0:
+        verified.set(key, claims, ttl)
+    return dict(claims)
@@ -0,0 +1,46 @@
+"""Persist small pieces of warm state across process restarts.
+
+Lambda keeps ``/tmp`` between invocations of a warm execution environment
+and containers can mount a volume, so state fetched from AWS once (such as
+the pool's password policy) can survive a worker restart without another
+API call. Everything here is best effort: a missing or unreadable file is a
+cache miss.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+
+def _path(name: str) -> str:
+    return os.path.join(settings.warm_state_dir, f"{name}.json")
+
+
+def load(name: str, max_age: float) -> Optional[Dict[str, Any]]:
+    """The data saved under ``name`` if it is younger than ``max_age`` seconds."""
+
+    try:
+        with open(_path(name), "r", encoding="utf-8") as fh:
+            entry = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("saved_at", 0) > max_age:
+        return None
+    return entry.get("data")
+
+
+def save(name: str, data: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(settings.warm_state_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=settings.warm_state_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"saved_at": time.time(), "data": data}, fh)
+        os.replace(tmp, _path(name))
+    except OSError:
+        pass
@@ -0,0 +1,119 @@
+"""API Gateway Lambda authorizer backed by the user pool's signing keys.
+
+Handler: ``authorizer.lambda_handler``. Only ``app.tokens`` (PyJWT and the
+key store) is imported; Flask, Flasgger, boto3 and the routes stay out of the
+cold start that ``main.lambda_handler`` pays for.
+
+REST API ``TOKEN`` and ``REQUEST`` events and HTTP API events are accepted.
+``AUTHORIZER_RESPONSE=policy`` (default) answers with an IAM policy allowing
+the whole API stage, so API Gateway's own authorizer cache can reuse it for
+any route; ``simple`` answers ``{"isAuthorized", "context"}`` for HTTP APIs
+with simple responses enabled. Missing or invalid tokens raise
+``Unauthorized`` (policy) or return ``isAuthorized: false`` (simple).
+
+Decisions are cached per principal, group membership and API stage for up
+to ``AUTHORIZER_POLICY_TTL`` seconds (never past the token's ``exp``), so a
+warm invocation costs one signature check and a dict lookup. The
+``context`` is rebuilt from each token, since tokens of one principal can
+carry different claims.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from app.cache import TTLCache
+from app.config import settings
+from app.tokens import verify_jwt
+
+
+# (principal, groups, resource, mode) -> response without its context
+_responses = TTLCache(max_entries=10000, ttl=settings.authorizer_policy_ttl)
+
+_CONTEXT_CLAIMS = {
+    "sub": "sub",
+    "username": "username",
+    "email": "email",
+    "groups": "cognito:groups",
+    "token_use": "token_use",
+}
+
+
+class Unauthorized(Exception):
+    """Raised so API Gateway answers 401; the message must be exactly this."""
+
+    def __init__(self):
+        super().__init__("Unauthorized")
+
+
+def token_from_event(event: Dict[str, Any]) -> Optional[str]:
+    if event.get("type") == "TOKEN":
+        value = event.get("authorizationToken")
+    else:
+        identity = event.get("identitySource")
+        value = identity[0] if isinstance(identity, list) and identity else identity
+        if not isinstance(value, str):
+            headers = event.get("headers") or {}
+            value = headers.get("authorization") or headers.get("Authorization")
+    if not value:
+        return None
+    return value[7:] if value.startswith("Bearer ") else value
+
+
+def stage_resource(arn: str) -> str:
+    """``arn:...:api/stage/GET/pets`` -> ``arn:...:api/stage/*``."""
+
+    parts = arn.split("/", 2)
+    return "/".join(parts[:2]) + "/*" if len(parts) >= 2 else arn
+
+
+def _context(claims: Dict[str, Any]) -> Dict[str, str]:
+    context = {}
+    for key, claim in _CONTEXT_CLAIMS.items():
+        value = claims.get(claim)
+        if value is not None:
+            context[key] = ",".join(value) if isinstance(value, list) else str(value)
+    return context
+
+
+def _decision(claims: Dict[str, Any], resource: str, mode: str) -> Dict[str, Any]:
+    if mode == "simple":
+        return {"isAuthorized": True}
+    return {
+        "principalId": claims["sub"],
+        "policyDocument": {
+            "Version": "2012-10-17",
+            "Statement": [{"Action": "execute-api:Invoke", "Effect": "Allow", "Resource": resource}],
+        },
+    }
+
+
+def build_response(claims: Dict[str, Any], resource: str, mode: str) -> Dict[str, Any]:
+    return dict(_decision(claims, resource, mode), context=_context(claims))
+
+
+def authorize(event: Dict[str, Any], mode: Optional[str] = None) -> Dict[str, Any]:
+    mode = mode or settings.authorizer_response
+    token = token_from_event(event)
+    try:
+        if not token:
+            raise ValueError("missing token")
+        claims = verify_jwt(token)
+    except Exception:
+        if mode == "simple":
+            return {"isAuthorized": False}
+        raise Unauthorized()
+
+    resource = stage_resource(event.get("methodArn") or event.get("routeArn") or "*")
+    groups = claims.get("cognito:groups") or ()
+    key = (claims["sub"], tuple(groups), resource, mode)
+    decision = _responses.get(key)
+    if decision is None:
+        decision = _decision(claims, resource, mode)
+        ttl = min(settings.authorizer_policy_ttl, claims.get("exp", 0) - time.time())
+        if ttl > 0:
+            _responses.set(key, decision, ttl)
+    return dict(decision, context=_context(claims))
+
+
+def lambda_handler(event, context):
+    return authorize(event)
@@ -0,0 +1,6 @@
+"""Offline microbenchmarks for the auth hot paths.
+
+Run with ``python -m benchmarks``. Cognito, the JWKS endpoint and the hosted
+UI token endpoint are stubbed, so results only measure this service's own
+overhead and can be compared across commits against ``baseline.json``.
+"""
@@ -0,0 +1,81 @@
+"""Command line entry point: ``python -m benchmarks``."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+from .harness import CASES, compare, load_baseline, measure, report
+from . import suite  # registers the cases
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Auth hot-path microbenchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply each case's iteration count")
+    parser.add_argument("--json", dest="json_path", help="write machine-readable results here ('-' for stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=1.5, help="fail when best time exceeds baseline by this factor")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--cassette", help="replay Cognito responses recorded with benchmarks.cassette")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="sleep recorded latency times this when replaying")
+    args = parser.parse_args(argv)
+
+    if args.cassette:
+        suite.use_cassette(args.cassette, args.latency_scale)
+
+    selected = [c for c in CASES if args.filter in c.name]
+    results = []
+    for bench in selected:
+        result = measure(bench, repeat=args.repeat, scale=args.scale)
+        results.append(result)
+        print(f"{result.name:<40} best {result.best_us:>10.2f} us   median {result.median_us:>10.2f} us", file=sys.stderr)
+
+    payload = report(results)
+
+    if args.save_baseline:
+        if args.filter and os.path.exists(args.baseline):
+            # A subset run only replaces its own rows
+            payload["cases"] = {**load_baseline(args.baseline).get("cases", {}), **payload["cases"]}
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    exit_code = 0
+    if os.path.exists(args.baseline):
+        rows = compare(results, load_baseline(args.baseline), args.threshold)
+        payload["comparison"] = {"threshold": args.threshold, "rows": rows}
+        regressed = [row for row in rows if row["regressed"]]
+        for row in regressed:
+            print(
+                f"REGRESSION {row['name']}: {row['best_us']:.2f} us vs baseline median "
+                f"{row['baseline_us']:.2f} us (x{row['ratio']:.2f} > x{args.threshold})",
+                file=sys.stderr,
+            )
+        missing = [row for row in rows if row["missing"]]
+        for row in missing:
+            print(f"NO BASELINE {row['name']}: record it with --save-baseline", file=sys.stderr)
+        if regressed or missing:
+            exit_code = 1
+
+    if args.json_path == "-":
+        json.dump(payload, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+    elif args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
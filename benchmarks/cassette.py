@@ -0,0 +1,395 @@
+"""Record real Cognito traffic once, replay it offline with its latency.
+
+Recording wraps the ``cognito`` boto3 client and the HTTP helpers in
+``app.cognito`` / ``app.tokens`` (OIDC discovery, JWKS, the hosted UI token
+exchange used by the social routes) and writes every response, with tokens,
+passwords, codes and secrets redacted and user attributes masked, to a
+gzip'd JSON cassette:
+
+    python -m benchmarks.cassette record cognito.json.gz     # dev server on :5000 against the real pool
+    python -m benchmarks.cassette show cognito.json.gz       # operations, counts, latency percentiles
+
+Replaying answers each call with the next recorded response for the same
+operation (or method and URL), cycling when they run out, after sleeping
+the recorded latency times ``latency_scale``:
+
+    python -m benchmarks --cassette cognito.json.gz                      # overhead only (scale 0)
+    python -m benchmarks.serve gthread --cassette cognito.json.gz --latency-scale 1
+
+Calls the cassette has no entry for fall through to the stubs. Redacted
+tokens are replaced with tokens from ``token_factory`` on replay, and the
+recorded JWKS is not replayed in that case, so the app can verify them
+against the stub keys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+REDACTED = "<redacted>"
+
+# Compared case-insensitively with underscores removed, so "PASSWORD" in
+# AuthParameters and "client_secret" in form data are caught too
+SECRET_KEYS = {
+    "accesstoken", "idtoken", "refreshtoken", "session", "secrethash", "secretcode",
+    "password", "proposedpassword", "previouspassword", "newpassword", "confirmationcode",
+    "usercode", "clientsecret", "code", "authorization",
+}
+
+# User attributes (OIDC claim names, which Cognito uses too) and user ids,
+# matched exactly; their values are replaced by a digest so repeats still match
+PII_KEYS = {
+    "email", "name", "given_name", "family_name", "middle_name", "nickname", "preferred_username",
+    "phone_number", "address", "birthdate", "sub", "username", "cognito:username",
+    "Username", "UserSub",
+}
+
+# Redacted response fields refilled from ``token_factory`` on replay
+TOKEN_USES = {"AccessToken": "access", "IdToken": "id", "access_token": "access", "id_token": "id"}
+
+Entry = Dict[str, Any]
+
+
+def _is_secret(key: str) -> bool:
+    return key.replace("_", "").lower() in SECRET_KEYS
+
+
+def mask(value: str) -> str:
+    return "<pii:" + hashlib.blake2b(value.encode("utf-8"), digest_size=6).hexdigest() + ">"
+
+
+def redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.get("Name") in PII_KEYS and isinstance(value.get("Value"), str):
+            return dict(value, Value=mask(value["Value"]))  # {"Name": "email", "Value": ...} attribute lists
+        return {
+            k: REDACTED if v and _is_secret(k) else mask(v) if k in PII_KEYS and isinstance(v, str) else redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+def redact_text(text: str) -> str:
+    """A non-JSON body: form fields redacted like JSON ones, anything else dropped."""
+
+    if not text:
+        return text
+    try:
+        fields = parse_qsl(text, keep_blank_values=True, strict_parsing=True)
+    except ValueError:
+        return REDACTED
+    redacted = []
+    for key, value in fields:
+        redacted.extend(redact({key: value}).items())
+    return urlencode(redacted)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"$bytes": value.decode("latin-1")}
+    raise TypeError(f"Cannot record {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$bytes" in obj:
+            return obj["$bytes"].encode("latin-1")
+    return obj
+
+
+def _url_key(method: str, url: str) -> str:
+    parts = urlsplit(url)
+    return f"http:{method} {urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))}"
+
+
+class Cassette:
+    def __init__(self, entries: Optional[List[Entry]] = None):
+        self.entries: List[Entry] = entries or []
+        self._lock = threading.Lock()
+
+    def add(self, entry: Entry) -> None:
+        with self._lock:
+            self.entries.append(entry)
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            entries = list(self.entries)
+        data = json.dumps({"version": 1, "entries": entries}, default=_encode, separators=(",", ":"))
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as fh:
+            fh.write(data)
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as fh:
+            return cls(json.load(fh, object_hook=_decode)["entries"])
+
+
+# -- recording -----------------------------------------------------------------
+
+class Recorder:
+    """Appends every call made through the installed client and modules."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    def install(self, client, *modules) -> None:
+        if client is not None:
+            events = client.meta.events
+            events.register("before-parameter-build.*.*", self._before_build, unique_id="cassette-record-params")
+            events.register("before-call.*.*", self._before_call, unique_id="cassette-record-before")
+            events.register("after-call.*.*", self._after_call, unique_id="cassette-record-after")
+        for module in modules:
+            if hasattr(module, "requests"):
+                module.requests = _RecordingRequests(module.requests, self.cassette)
+            if hasattr(module, "fetch_json"):
+                module.fetch_json = self._recording_fetch_json(module.fetch_json)
+
+    def _before_build(self, params, context, **kwargs):
+        context["cassette_params"] = redact(params)
+
+    def _before_call(self, context, **kwargs):
+        context["cassette_start"] = time.perf_counter()
+
+    def _after_call(self, model, http_response, parsed, context, **kwargs):
+        started = context.get("cassette_start")
+        response = {k: v for k, v in parsed.items() if k != "ResponseMetadata"}
+        self.cassette.add({
+            "key": f"aws:{model.name}",
+            "status": http_response.status_code,
+            "ms": round((time.perf_counter() - started) * 1000, 3) if started else 0.0,
+            "request": context.get("cassette_params"),
+            "response": redact(response),
+        })
+
+    def _recording_fetch_json(self, fetch_json):
+        def recording(url, timeout=10):
+            started = time.perf_counter()
+            body = fetch_json(url, timeout)
+            self.cassette.add({
+                "key": _url_key("GET", url),
+                "status": 200,
+                "ms": round((time.perf_counter() - started) * 1000, 3),
+                "response": redact(body),
+            })
+            return body
+
+        return recording
+
+
+class _RecordingRequests:
+    def __init__(self, real, cassette: Cassette):
+        self._real = real
+        self._cassette = cassette
+        self.RequestException = getattr(real, "RequestException", Exception)
+
+    def get(self, url, **kwargs):
+        return self._call("GET", url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self._call("POST", url, kwargs)
+
+    def _call(self, method, url, kwargs):
+        started = time.perf_counter()
+        resp = getattr(self._real, method.lower())(url, **kwargs)
+        ms = (time.perf_counter() - started) * 1000
+        try:
+            body, text = resp.json(), None
+        except ValueError:
+            body, text = None, resp.text
+        self._cassette.add({
+            "key": _url_key(method, url),
+            "status": resp.status_code,
+            "ms": round(ms, 3),
+            "request": redact(kwargs.get("data") or kwargs.get("params")),
+            "response": redact(body),
+            "text": redact_text(text) if text is not None else None,
+        })
+        return resp
+
+
+# -- replay --------------------------------------------------------------------
+
+class ReplayResponse:
+    """Just enough of ``requests.Response`` for the call sites in ``app``."""
+
+    def __init__(self, status_code: int, body: Any, text: Optional[str]):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body
+        self.text = text if text is not None else json.dumps(body)
+
+    def json(self) -> Any:
+        if self._body is None:
+            raise ValueError("response body is not JSON")
+        return self._body
+
+
+class Player:
+    """Answers calls from a cassette, sleeping ``ms * latency_scale`` first."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency_scale: float = 1.0,
+        token_factory: Optional[Callable[[str], str]] = None,
+    ):
+        self.latency_scale = latency_scale
+        self.token_factory = token_factory
+        grouped: Dict[str, List[Entry]] = defaultdict(list)
+        for entry in cassette.entries:
+            if token_factory and entry["key"].endswith("/.well-known/jwks.json"):
+                continue  # refilled tokens are signed by the stub keys
+            grouped[entry["key"]].append(dict(entry, response=self._refill(entry.get("response"))))
+        self._entries = {key: itertools.cycle(entries) for key, entries in grouped.items()}
+        self._lock = threading.Lock()
+
+    def _refill(self, value: Any) -> Any:
+        if not self.token_factory:
+            return value
+        if isinstance(value, dict):
+            return {
+                k: self.token_factory(TOKEN_USES[k]) if k in TOKEN_USES and v == REDACTED else self._refill(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self._refill(v) for v in value]
+        return value
+
+    def next(self, key: str) -> Optional[Entry]:
+        entries = self._entries.get(key)
+        if entries is None:
+            return None
+        with self._lock:
+            entry = next(entries)
+        if self.latency_scale and entry["ms"]:
+            time.sleep(entry["ms"] / 1000 * self.latency_scale)
+        return entry
+
+    def install(self, client, *modules) -> None:
+        """Put the cassette in front of ``client`` and the HTTP helpers in ``modules``."""
+
+        if client is not None:
+            client.meta.events.register_first("before-call.cognito-identity-provider.*", self._before_call)
+        for module in modules:
+            if hasattr(module, "requests"):
+                module.requests = _ReplayRequests(self, module.requests)
+            if hasattr(module, "fetch_json"):
+                module.fetch_json = self._replay_fetch_json(module.fetch_json)
+
+    def _before_call(self, model, **kwargs):
+        entry = self.next(f"aws:{model.name}")
+        if entry is None:
+            return None
+        from botocore.awsrequest import AWSResponse
+
+        return AWSResponse(None, entry["status"], {}, None), entry["response"]
+
+    def _replay_fetch_json(self, fallback):
+        def replay(url, timeout=10):
+            entry = self.next(_url_key("GET", url))
+            if entry is None:
+                return fallback(url, timeout)
+            if entry["status"] >= 400:
+                raise OSError(f"HTTP {entry['status']} for {url}")
+            return entry["response"]
+
+        return replay
+
+
+class _ReplayRequests:
+    def __init__(self, player: Player, fallback):
+        self._player = player
+        self._fallback = fallback
+        self.RequestException = getattr(fallback, "RequestException", Exception)
+
+    def get(self, url, **kwargs):
+        return self._call("GET", url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self._call("POST", url, kwargs)
+
+    def _call(self, method, url, kwargs):
+        entry = self._player.next(_url_key(method, url))
+        if entry is None:
+            return getattr(self._fallback, method.lower())(url, **kwargs)
+        return ReplayResponse(entry["status"], entry.get("response"), entry.get("text"))
+
+
+# -- command line --------------------------------------------------------------
+
+def summarize(cassette: Cassette) -> Dict[str, Dict[str, Any]]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    for entry in cassette.entries:
+        latencies[entry["key"]].append(entry["ms"])
+    summary = {}
+    for key, values in sorted(latencies.items()):
+        values.sort()
+        summary[key] = {
+            "count": len(values),
+            "p50_ms": round(statistics.median(values), 2),
+            "p99_ms": round(values[min(len(values) - 1, int(0.99 * len(values)))], 2),
+        }
+    return summary
+
+
+def record(path: str, host: str, port: int) -> None:
+    """Serve the app against the real pool (settings from the environment) and record."""
+
+    from app import cognito as cognito_module
+    from app import tokens as tokens_module
+
+    cassette = Cassette()
+    Recorder(cassette).install(cognito_module.cognito, cognito_module, tokens_module)
+
+    from main import flask_app
+
+    print(f"Recording to {path}; exercise the API on http://{host}:{port} and press Ctrl-C to stop", file=sys.stderr)
+    try:
+        flask_app.run(host=host, port=port, debug=False)
+    finally:
+        cassette.save(path)
+        print(f"Saved {len(cassette.entries)} calls to {path}", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Record or inspect Cognito cassettes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="run the dev server against the real pool and record its calls")
+    rec.add_argument("path")
+    rec.add_argument("--host", default="127.0.0.1")
+    rec.add_argument("--port", type=int, default=5000)
+    show = sub.add_parser("show", help="summarize a cassette")
+    show.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.path, args.host, args.port)
+    else:
+        for key, row in summarize(Cassette.load(args.path)).items():
+            print(f"{key:<70} {row['count']:>5}   p50 {row['p50_ms']:>8} ms   p99 {row['p99_ms']:>8} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Cold start and per-invocation cost of the Lambda entry points.
+
+    python -m benchmarks.coldstart              # authorizer vs main, 5 fresh processes each
+    python -m benchmarks.coldstart --runs 10 --json coldstart.json
+
+Each run starts a new interpreter (as a Lambda cold start does), times the
+handler module's import and its first invocation, then the mean of warm
+invocations. The JWKS fetch is stubbed, so the first invocation includes
+parsing the keys but no network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from . import stubs
+
+
+HANDLERS = ["authorizer", "main"]
+WARM_INVOCATIONS = 500
+
+# The handler is imported before anything from ``benchmarks`` so the stubs'
+# own imports (PyJWT, botocore) are not counted as already loaded
+_CHILD = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "module = __import__(sys.argv[1])\n"
+    "import_ms = (time.perf_counter() - started) * 1000\n"
+    "from benchmarks.coldstart import child\n"
+    "child(module, import_ms)\n"
+)
+
+
+def _event(module: str, token: str) -> Dict[str, Any]:
+    if module == "authorizer":
+        return {
+            "type": "TOKEN",
+            "authorizationToken": f"Bearer {token}",
+            "methodArn": "arn:aws:execute-api:us-east-1:123456789012:abcdef1234/prod/GET/pets",
+        }
+    return {
+        "version": "2.0",
+        "rawPath": "/me",
+        "headers": {"authorization": f"Bearer {token}", "host": "bench.lambda-url.us-east-1.on.aws"},
+        "body": None,
+        "isBase64Encoded": False,
+        "requestContext": {"stage": "$default", "http": {"method": "GET", "path": "/me", "sourceIp": "203.0.113.1"}},
+    }
+
+
+def child(handler_module, import_ms: float) -> None:
+    """Runs in the fresh interpreter; prints one JSON line."""
+
+    from app import tokens
+
+    stubs.install(None, tokens)
+    event = _event(handler_module.__name__, stubs.mint_token("access"))
+
+    first = time.perf_counter()
+    handler_module.lambda_handler(event, None)
+    first_done = time.perf_counter()
+
+    warm = time.perf_counter()
+    for _ in range(WARM_INVOCATIONS):
+        handler_module.lambda_handler(event, None)
+    warm_done = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": import_ms,
+        "first_invoke_ms": (first_done - first) * 1000,
+        "warm_invoke_us": (warm_done - warm) / WARM_INVOCATIONS * 1e6,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def run(module: str, runs: int) -> Dict[str, float]:
+    samples: List[Dict[str, float]] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD, module],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=os.environ.copy(),
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: round(statistics.median(s[key] for s in samples), 2) for key in samples[0]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Lambda entry point cold start comparison")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    stubs.configure_env()  # inherited by the child processes
+
+    results = {module: run(module, args.runs) for module in HANDLERS}
+    print(f"{'handler':<12} {'import':>10} {'first call':>11} {'warm call':>11} {'max RSS':>9}", file=sys.stderr)
+    for module, r in results.items():
+        print(
+            f"{module:<12} {r['import_ms']:>8.1f}ms {r['first_invoke_ms']:>9.2f}ms {r['warm_invoke_us']:>9.1f}us "
+            f"{r['max_rss_mb']:>7.1f}MB",
+            file=sys.stderr,
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump({"runs": args.runs, "handlers": results}, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
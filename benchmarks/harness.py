@@ -0,0 +1,137 @@
+"""Case registry, timing loop and baseline comparison."""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], Any]
+    number: int = 1000
+    setup: Optional[Callable[[], Any]] = None
+    teardown: Optional[Callable[[], Any]] = None
+
+
+@dataclass
+class Result:
+    name: str
+    number: int
+    best_us: float
+    median_us: float
+    samples_us: List[float] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "number": self.number,
+            "best_us": round(self.best_us, 3),
+            "median_us": round(self.median_us, 3),
+        }
+
+
+CASES: List[Case] = []
+
+
+def case(
+    name: str,
+    number: int = 1000,
+    setup: Optional[Callable[[], Any]] = None,
+    teardown: Optional[Callable[[], Any]] = None,
+):
+    """Register ``fn`` as a benchmark case timed ``number`` times per repeat.
+
+    ``teardown`` runs after the case, to stop anything it started (threads)
+    that would otherwise run during later cases.
+    """
+
+    def decorator(fn):
+        CASES.append(Case(name=name, fn=fn, number=number, setup=setup, teardown=teardown))
+        return fn
+
+    return decorator
+
+
+def measure(bench: Case, repeat: int = 5, scale: float = 1.0) -> Result:
+    """Time ``bench``; like ``timeit``, the garbage collector is off while timing.
+
+    Earlier cases leave garbage and a bigger heap behind; collecting it
+    inside a later case's samples made a full run slower than ``-k``.
+    """
+
+    number = max(1, int(bench.number * scale))
+    fn = bench.fn
+    if bench.setup is not None:
+        bench.setup()
+    samples = []
+    try:
+        fn()  # warm-up: first-call imports and lazy caches are not the hot path
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter_ns()
+                for _ in range(number):
+                    fn()
+                samples.append((time.perf_counter_ns() - start) / number / 1000.0)
+        finally:
+            gc.enable()
+    finally:
+        if bench.teardown is not None:
+            bench.teardown()
+
+    return Result(
+        name=bench.name,
+        number=number,
+        best_us=min(samples),
+        median_us=statistics.median(samples),
+        samples_us=samples,
+    )
+
+
+def report(results: List[Result]) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": {r.name: r.as_dict() for r in results},
+    }
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(results: List[Result], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Return one row per case; ``regressed`` is set when ``best`` exceeds
+    ``threshold`` times the baseline ``median`` (one lucky sample in the
+    reference run cannot lower it), ``missing`` when the case has
+    no baseline row (a new case must be recorded before it can be checked)."""
+
+    rows = []
+    cases = baseline.get("cases", {})
+    for r in results:
+        base = cases.get(r.name)
+        if base is None:
+            rows.append({
+                "name": r.name, "best_us": r.best_us, "baseline_us": None, "ratio": None,
+                "regressed": False, "missing": True,
+            })
+            continue
+        reference = base["median_us"]
+        ratio = r.best_us / reference if reference else float("inf")
+        rows.append({
+            "name": r.name,
+            "best_us": r.best_us,
+            "baseline_us": reference,
+            "ratio": ratio,
+            "regressed": ratio > threshold,
+            "missing": False,
+        })
+    return rows
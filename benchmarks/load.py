@@ -0,0 +1,172 @@
+"""Load-test comparison of the dev server and the container server modes.
+
+    python -m benchmarks.load                      # dev vs gthread vs gevent
+    python -m benchmarks.load --modes dev gthread --concurrency 64 --duration 10
+    python -m benchmarks.load --modes gthread --paths /auth/check   # proxy subrequests
+    python -m benchmarks.load --modes gthread --latency 0.5 --admission   # overload with shedding on
+
+Each mode is started with ``benchmarks.serve`` (stubbed Cognito with a fixed
+per-call latency) and driven by keep-alive client threads alternating
+between ``GET /profile`` (one Cognito call) and ``GET /me`` (local only),
+or through ``--paths``. ``--admission`` starts the servers with
+``ADMISSION_CONTROL=1``; ``503`` answers are counted as ``shed`` rather than
+errors, and each path gets its own latency percentiles.
+Prints a table and, with ``--json``, writes the numbers for comparison
+across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from . import stubs
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/me")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _client(
+    port: int,
+    paths: List[str],
+    headers: Dict[str, str],
+    stop: float,
+    latencies: Dict[str, List[float]],
+    errors: List[int],
+) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    i = 0
+    while time.monotonic() < stop:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+            if resp.getheader("Connection", "").lower() == "close":
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies[path].append((time.perf_counter() - started) * 1000)
+    conn.close()
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(values)
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(p * len(values)))], 2) if values else None
+
+    return {"p50_ms": pct(0.50), "p99_ms": pct(0.99)}
+
+
+def run_mode(
+    mode: str, port: int, paths: List[str], concurrency: int, duration: float, latency: float, admission: bool = False
+) -> Dict[str, Any]:
+    env = dict(os.environ, ADMISSION_CONTROL="1") if admission else None
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", mode, "--port", str(port), "--latency", str(latency)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=env,
+    )
+    try:
+        _wait_ready(port)
+        headers = {"Authorization": f"Bearer {stubs.mint_token('access')}"}
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: List[int] = []
+        stop = time.monotonic() + duration
+        threads = [
+            threading.Thread(target=_client, args=(port, paths, headers, stop, latencies, errors))
+            for _ in range(concurrency)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    every = [ms for values in latencies.values() for ms in values]
+    shed = errors.count(503) if admission else 0
+    return {
+        "requests": len(every),
+        "errors": len(errors) - shed,
+        "shed": shed,
+        "rps": round(len(every) / duration, 1),
+        **_percentiles(every),
+        "mean_ms": round(statistics.fmean(every), 2) if every else None,
+        "by_path": {path: dict(requests=len(values), **_percentiles(values)) for path, values in latencies.items()},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Dev server vs container server load test")
+    parser.add_argument("--modes", nargs="+", default=["dev", "gthread", "gevent"])
+    parser.add_argument("--paths", nargs="+", default=["/profile", "/me"], help="GET paths, requested in turn")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per stubbed Cognito call")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--admission", action="store_true", help="run the servers with ADMISSION_CONTROL=1")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for offset, mode in enumerate(args.modes):
+        results[mode] = run_mode(
+            mode, args.port + offset, args.paths, args.concurrency, args.duration, args.latency, args.admission
+        )
+        r = results[mode]
+        print(
+            f"{mode:<8} {r['rps']:>8} req/s   p50 {r['p50_ms']} ms   p99 {r['p99_ms']} ms   "
+            f"errors {r['errors']}   shed {r['shed']}",
+            file=sys.stderr,
+        )
+        for path, row in r["by_path"].items():
+            print(f"  {path:<22} {row['requests']:>7}   p50 {row['p50_ms']} ms   p99 {row['p99_ms']} ms", file=sys.stderr)
+
+    payload = {
+        "paths": args.paths,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "cognito_latency_s": args.latency,
+        "admission": args.admission,
+        "modes": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Run the app against stubbed Cognito behind a chosen server.
+
+    python -m benchmarks.serve dev|gthread|gevent|sync --port 8001 --latency 0.05
+    python -m benchmarks.serve gthread --cassette cognito.json.gz --latency-scale 1
+
+Used by ``benchmarks.load``; each Cognito call sleeps ``--latency`` seconds
+so server concurrency, not stub speed, dominates.
+"""
+
+import argparse
+import os
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["dev", "gthread", "gevent", "sync"])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--cassette", help="replay a recorded cassette in front of the stubs")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplies the cassette's recorded latency")
+    args = parser.parse_args(argv)
+
+    if args.mode == "gevent":
+        from gevent import monkey
+
+        monkey.patch_all()
+
+    from . import stubs
+
+    stubs.configure_env()
+    os.environ["PROFILE_CACHE_TTL"] = "0"  # every GET /profile reaches (stubbed) Cognito
+    if args.mode != "dev":
+        os.environ["SERVER_WORKER_CLASS"] = args.mode
+        os.environ["SERVER_BIND"] = f"127.0.0.1:{args.port}"
+
+    from app import cognito as cognito_module
+    from app import tokens as tokens_module
+
+    stubs.install(cognito_module.cognito, cognito_module, tokens_module, latency=args.latency)
+    if args.cassette:
+        from .cassette import Cassette, Player
+
+        player = Player(Cassette.load(args.cassette), args.latency_scale, token_factory=stubs.issued_token)
+        player.install(cognito_module.cognito, cognito_module, tokens_module)
+        stubs.install(cognito_module.cognito, latency=args.latency)  # for calls the cassette lacks
+
+    if args.mode == "dev":
+        from main import flask_app
+
+        flask_app.run(host="127.0.0.1", port=args.port, debug=False)
+        return
+
+    import server
+
+    sys.argv = sys.argv[:1]  # gunicorn parses argv otherwise
+    server.Server(server.server_options()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Per-worker caches vs the shared-memory cache across worker processes.
+
+    python -m benchmarks.shared_cache                       # 4 workers, 500 users, 5 requests each
+    python -m benchmarks.shared_cache --workers 8 --json shared.json
+
+Each mode starts ``--workers`` fresh processes that call ``verify_jwt`` for
+the same population of ``--tokens`` distinct tokens in a different random
+order, the way a load balancer spreads one user's requests over workers.
+``per-worker`` runs with ``SHARED_CACHE`` unset, ``shared`` with all
+workers mapping one table. The JWKS fetch is stubbed with ``--jwks-latency``
+seconds of wait. Reported per mode: signature verifications and JWKS
+fetches summed over the workers, the run phase's wall time and the mean
+``verify_jwt`` call. Both cache lookups are also timed in-process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Any, Dict, List
+
+from . import stubs
+
+
+MODES = ["per-worker", "shared"]
+
+
+def _table_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"cognito-auth-kit-bench-{os.getpid()}.cache")
+
+
+def child(tokens_path: str, requests: int, start_at: float, jwks_latency: float, seed: int) -> None:
+    """Runs in a fresh interpreter; prints one JSON line."""
+
+    stubs.configure_env()
+    from app import tokens
+    from app.metrics import registry
+
+    stubs.install(None, tokens)
+    fetch = tokens.fetch_json
+
+    def slow_fetch(url, timeout=10):
+        time.sleep(jwks_latency)
+        return fetch(url, timeout)
+
+    tokens.fetch_json = slow_fetch
+
+    with open(tokens_path, encoding="utf-8") as fh:
+        population: List[str] = json.load(fh)
+    order = [token for token in population for _ in range(requests)]
+    random.Random(seed).shuffle(order)
+
+    time.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    for token in order:
+        tokens.verify_jwt(token)
+    elapsed = time.perf_counter() - started
+
+    metrics = registry.snapshot()
+    print(json.dumps({
+        "calls": len(order),
+        "elapsed_s": elapsed,
+        "verifications": metrics["tokens.cache_misses"],
+        "jwks_fetches": metrics["jwks.fetches"],
+    }))
+
+
+def run_mode(mode: str, workers: int, tokens_path: str, requests: int, jwks_latency: float) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.pop("SHARED_CACHE", None)
+    path = None
+    if mode == "shared":
+        path = env["SHARED_CACHE"] = _table_path()
+    start_at = time.time() + 3.0  # after every worker has imported the app
+    procs = [
+        subprocess.Popen(
+            [
+                sys.executable, "-c",
+                "import sys; from benchmarks.shared_cache import child; "
+                "child(sys.argv[1], int(sys.argv[2]), float(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5]))",
+                tokens_path, str(requests), repr(start_at), str(jwks_latency), str(seed),
+            ],
+            env=env,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for seed in range(workers)
+    ]
+    try:
+        rows = [json.loads(proc.communicate(timeout=600)[0]) for proc in procs]
+    finally:
+        for table_file in glob.glob(f"{path}.*") if path else []:
+            os.unlink(table_file)
+
+    calls = sum(r["calls"] for r in rows)
+    return {
+        "verifications": sum(r["verifications"] for r in rows),
+        "jwks_fetches": sum(r["jwks_fetches"] for r in rows),
+        "wall_s": round(max(r["elapsed_s"] for r in rows), 3),
+        "mean_call_us": round(sum(r["elapsed_s"] for r in rows) / calls * 1e6, 2),
+    }
+
+
+def lookup_costs() -> Dict[str, float]:
+    """Hit latency of one lookup: per-process ``TTLCache`` vs the shared table alone (no local front)."""
+
+    from app.cache import TTLCache
+    from app.shmcache import SharedTable, SharedTTLCache
+
+    claims = {"sub": stubs.USER_SUB, "email": stubs.EMAIL, "cognito:groups": ["admin", "beta"], "exp": 2**31}
+    key = b"0123456789abcdef"
+    table = SharedTable(_table_path())
+    try:
+        caches = {"ttlcache_get_us": TTLCache(), "shared_table_get_us": SharedTTLCache(table, "bench", 60)}
+        costs = {}
+        for name, cache in caches.items():
+            cache.set(key, claims)
+            number = 100000
+            costs[name] = round(min(timeit.repeat(lambda: cache.get(key), number=number, repeat=5)) / number * 1e6, 3)
+        return costs
+    finally:
+        os.unlink(table.path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-worker vs shared-memory token caches")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tokens", type=int, default=500, help="distinct tokens (users)")
+    parser.add_argument("--requests", type=int, default=5, help="calls per token per worker")
+    parser.add_argument("--jwks-latency", type=float, default=0.1, help="seconds per stubbed JWKS fetch")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    population = [stubs.mint_token("access", jti=f"bench-{i}") for i in range(args.tokens)]
+    fd, tokens_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(population, fh)
+
+    results: Dict[str, Any] = {}
+    try:
+        for mode in MODES:
+            results[mode] = r = run_mode(mode, args.workers, tokens_path, args.requests, args.jwks_latency)
+            print(
+                f"{mode:<11} verifications {r['verifications']:>6}   jwks fetches {r['jwks_fetches']:>3}   "
+                f"wall {r['wall_s']:>7} s   mean call {r['mean_call_us']:>8} us",
+                file=sys.stderr,
+            )
+    finally:
+        os.unlink(tokens_path)
+
+    stubs.configure_env()
+    costs = lookup_costs()
+    print(f"lookup hit  TTLCache {costs['ttlcache_get_us']} us   shared table {costs['shared_table_get_us']} us", file=sys.stderr)
+
+    payload = {
+        "workers": args.workers,
+        "tokens": args.tokens,
+        "requests_per_token": args.requests,
+        "jwks_latency_s": args.jwks_latency,
+        "modes": results,
+        "lookup": costs,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""Offline stand-ins for Cognito, the JWKS endpoint and the hosted UI.
+
+``configure_env`` must run before anything under ``app`` is imported, because
+``app.config.settings`` and the boto3 client are built at import time.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+import jwt
+from botocore.awsrequest import AWSResponse
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+
+REGION = "us-east-1"
+USER_POOL_ID = "us-east-1_BENCH0000"
+CLIENT_ID = "benchclient0000000000000000"
+CLIENT_SECRET = "benchsecret"
+COGNITO_DOMAIN = "https://bench.auth.us-east-1.amazoncognito.com"
+ISSUER = f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}"
+KID = "bench-key-1"
+USER_SUB = "8f524bb7-bc8c-4b74-b9b1-bf8fb1c9eb98"
+EMAIL = "bench.user@example.com"
+
+
+def configure_env() -> None:
+    """Point settings at the fake pool; overrides any local ``.env``."""
+
+    os.environ.update({
+        "FLASK_SECRET_KEY": "bench",
+        "WARM_STATE_DIR": os.path.join(tempfile.gettempdir(), "cognito-auth-kit-bench"),
+        "COGNITO_REGION": REGION,
+        "USER_POOL_ID": USER_POOL_ID,
+        "CLIENT_ID": CLIENT_ID,
+        "CLIENT_SECRET": CLIENT_SECRET,
+        "COGNITO_DOMAIN": COGNITO_DOMAIN,
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+    })
+
+
+def _signing_key():
+    """One key per machine, so ``benchmarks.load`` and the servers it starts agree."""
+
+    path = os.path.join(tempfile.gettempdir(), "cognito-auth-kit-bench-key.pem")
+    try:
+        with open(path, "rb") as fh:
+            return serialization.load_pem_private_key(fh.read(), password=None)
+    except (OSError, ValueError):
+        pass
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "wb") as fh:
+        fh.write(pem)
+    os.replace(tmp, path)
+    return key
+
+
+_private_key = _signing_key()
+_public_jwk = RSAAlgorithm.to_jwk(_private_key.public_key(), as_dict=True)
+_public_jwk.update({"kid": KID, "alg": "RS256", "use": "sig"})
+JWKS: Dict[str, Any] = {"keys": [_public_jwk]}
+
+
+def mint_token(token_use: str = "id", ttl: int = 3600, **extra: Any) -> str:
+    """Sign a token the way the user pool would."""
+
+    now = int(time.time())
+    claims = {
+        "sub": USER_SUB,
+        "iss": ISSUER,
+        "aud": CLIENT_ID,
+        "token_use": token_use,
+        "email": EMAIL,
+        "cognito:groups": ["admin", "beta"],
+        "iat": now,
+        "exp": now + ttl,
+    }
+    claims.update(extra)
+    return jwt.encode(claims, _private_key, algorithm="RS256", headers={"kid": KID})
+
+
+class FakeResponse:
+    """Just enough of ``requests.Response`` for the call sites in ``app``."""
+
+    def __init__(self, payload: Dict[str, Any], status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = str(payload)
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+
+# Tokens handed out by the fake login/refresh/token endpoints are minted once
+# so RSA signing in the stub does not show up in request timings.
+_ISSUED_ACCESS = mint_token("access", ttl=86400)
+_ISSUED_ID = mint_token("id", ttl=86400)
+
+
+def issued_token(token_use: str) -> str:
+    """The pre-minted token the fake pool hands out for ``token_use``."""
+
+    return _ISSUED_ACCESS if token_use == "access" else _ISSUED_ID
+
+
+def fake_get(url: str, **kwargs: Any) -> FakeResponse:
+    if url.endswith("/.well-known/jwks.json"):
+        return FakeResponse(JWKS)
+    if url.endswith("/.well-known/openid-configuration"):
+        return FakeResponse({
+            "issuer": ISSUER,
+            "authorization_endpoint": f"{COGNITO_DOMAIN}/oauth2/authorize",
+            "token_endpoint": f"{COGNITO_DOMAIN}/oauth2/token",
+            "jwks_uri": f"{ISSUER}/.well-known/jwks.json",
+        })
+    return FakeResponse({"error": "not_found"}, status_code=404)
+
+
+def fake_fetch_json(url: str, timeout: float = 10) -> Dict[str, Any]:
+    resp = fake_get(url)
+    if not resp.ok:
+        raise OSError(f"HTTP {resp.status_code} for {url}")
+    return resp.json()
+
+
+def fake_post(url: str, **kwargs: Any) -> FakeResponse:
+    if url.endswith("/oauth2/token"):
+        return FakeResponse({
+            "access_token": _ISSUED_ACCESS,
+            "id_token": _ISSUED_ID,
+            "refresh_token": "bench-refresh-token",
+            "expires_in": 3600,
+            "token_type": "Bearer",
+        })
+    return FakeResponse({"error": "not_found"}, status_code=404)
+
+
+def _auth_result() -> Dict[str, Any]:
+    return {
+        "AuthenticationResult": {
+            "AccessToken": _ISSUED_ACCESS,
+            "IdToken": _ISSUED_ID,
+            "RefreshToken": "bench-refresh-token",
+            "ExpiresIn": 3600,
+            "TokenType": "Bearer",
+        }
+    }
+
+
+_CODE_DELIVERY = {
+    "Destination": "b***@example.com",
+    "DeliveryMedium": "EMAIL",
+    "AttributeName": "email",
+}
+
+# Canned responses keyed by Cognito operation name.
+COGNITO_RESPONSES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "SignUp": lambda: {
+        "UserSub": USER_SUB,
+        "UserConfirmed": False,
+        "CodeDeliveryDetails": _CODE_DELIVERY,
+    },
+    "ConfirmSignUp": lambda: {},
+    "InitiateAuth": _auth_result,
+    "ForgotPassword": lambda: {"CodeDeliveryDetails": _CODE_DELIVERY},
+    "ConfirmForgotPassword": lambda: {},
+    "GetUser": lambda: {
+        "Username": USER_SUB,
+        "UserAttributes": [
+            {"Name": "sub", "Value": USER_SUB},
+            {"Name": "email", "Value": EMAIL},
+            {"Name": "email_verified", "Value": "true"},
+            {"Name": "name", "Value": "Bench User"},
+        ],
+    },
+    "UpdateUserAttributes": lambda: {"CodeDeliveryDetailsList": []},
+    "AdminListGroupsForUser": lambda: {
+        "Groups": [
+            {"GroupName": "admin", "UserPoolId": USER_POOL_ID, "Precedence": 1},
+            {"GroupName": "beta", "UserPoolId": USER_POOL_ID, "Precedence": 10},
+        ],
+    },
+    "ListDevices": lambda: {
+        "Devices": [{
+            "DeviceKey": "us-east-1_0a1b2c3d-bench",
+            "DeviceAttributes": [{"Name": "device_name", "Value": "Bench Browser"}],
+            "DeviceLastAuthenticatedDate": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        }],
+    },
+    "DescribeUserPool": lambda: {
+        "UserPool": {
+            "Id": USER_POOL_ID,
+            "Policies": {
+                "PasswordPolicy": {
+                    "MinimumLength": 8,
+                    "RequireUppercase": True,
+                    "RequireLowercase": True,
+                    "RequireNumbers": True,
+                    "RequireSymbols": True,
+                }
+            },
+        }
+    },
+}
+
+
+_EVENT = "before-call.cognito-identity-provider.*"
+
+
+def _responder(latency: float):
+    def before_call(model, **kwargs):
+        factory = COGNITO_RESPONSES.get(model.name)
+        if factory is None:
+            return None
+        if latency:
+            time.sleep(latency)
+        return AWSResponse(None, 200, {}, None), factory()
+
+    return before_call
+
+
+def install(client, *modules, latency: float = 0.0) -> None:
+    """Short-circuit ``client`` and replace the HTTP helpers in ``modules``.
+
+    The boto3 client still builds and validates each request; only the HTTP
+    send is skipped, so client-side overhead stays in the measurements.
+    ``latency`` seconds are slept per Cognito call to imitate the network
+    wait when measuring concurrency rather than CPU cost. Calling it again
+    with only ``client`` puts the stubs behind handlers registered since.
+    """
+
+    if client is not None:
+        # Re-registering moves the stubs behind handlers added since (a
+        # cassette player), which then answer first
+        client.meta.events.unregister(_EVENT, unique_id="bench-stubs")
+        client.meta.events.register_first(_EVENT, _responder(latency), unique_id="bench-stubs")
+    for module in modules:
+        if hasattr(module, "requests"):
+            module.requests = _FakeRequests
+        if hasattr(module, "fetch_json"):
+            module.fetch_json = fake_fetch_json
+
+
+class _FakeRequests:
+    get = staticmethod(fake_get)
+    post = staticmethod(fake_post)
+
@@ -0,0 +1,379 @@
+"""Benchmark cases for the auth hot paths."""
+
+from __future__ import annotations
+
+import json
+
+from . import cassette, stubs
+
+stubs.configure_env()
+
+from app import create_app  # noqa: E402
+from app import cognito as cognito_module  # noqa: E402
+from app import tokens as tokens_module  # noqa: E402
+from app.admission import build_gates, init_admission  # noqa: E402
+from app.auth_events import EventLog, init_auth_events  # noqa: E402
+from app.cognito import get_secret_hash, verify_jwt  # noqa: E402
+from app.decorators import require_bearer_token  # noqa: E402
+from app import profile_parts  # noqa: E402
+from app.password_policy import check_password  # noqa: E402
+from app.routes import gateway  # noqa: E402
+from app.validation import field_errors  # noqa: E402
+from app.sessions import MemorySessionStore, SessionManager  # noqa: E402
+import authorizer  # noqa: E402
+import main  # noqa: E402
+
+from .harness import case  # noqa: E402
+
+
+stubs.install(cognito_module.cognito, cognito_module, tokens_module)
+_replaying = False
+
+
+def use_cassette(path: str, latency_scale: float = 0.0) -> None:
+    """Answer Cognito calls from a recorded cassette instead of the canned stubs.
+
+    Recorded outcomes may differ from the stubs' (a recorded login could
+    have failed), so request cases stop asserting status codes.
+    """
+
+    global _replaying
+    player = cassette.Player(cassette.Cassette.load(path), latency_scale, token_factory=stubs.issued_token)
+    player.install(cognito_module.cognito, cognito_module, tokens_module)
+    stubs.install(cognito_module.cognito)  # stubs answer what the cassette lacks
+    _replaying = True
+
+ID_TOKEN = stubs.mint_token("id")
+ACCESS_TOKEN = stubs.mint_token("access")
+AUTH_HEADERS = {"Authorization": f"Bearer {ACCESS_TOKEN}"}
+
+flask_app = main.flask_app
+client = flask_app.test_client()
+
+
+def _warm_keys():
+    cognito_module.get_jwks()
+
+
+# -- token verification -----------------------------------------------------
+
+@case("verify_jwt.cold", number=200)
+def verify_jwt_cold():
+    cognito_module.key_store.clear()
+    tokens_module.verified.clear()
+    verify_jwt(ID_TOKEN)
+
+
+@case("verify_jwt.warm", number=1000, setup=_warm_keys)
+def verify_jwt_warm():
+    tokens_module.verified.clear()  # keys parsed, signature still checked
+    verify_jwt(ID_TOKEN)
+
+
+@case("verify_jwt.cached", number=20000, setup=_warm_keys)
+def verify_jwt_cached():
+    verify_jwt(ID_TOKEN)
+
+
+@case("get_secret_hash", number=20000)
+def secret_hash():
+    get_secret_hash(stubs.EMAIL)
+
+
+@require_bearer_token
+def _protected():
+    return "ok"
+
+
+@case("require_bearer_token", number=1000, setup=_warm_keys)
+def bearer_decorator():
+    with flask_app.test_request_context("/me", headers=AUTH_HEADERS):
+        _protected()
+
+
+_session_manager = SessionManager(MemorySessionStore(), ttl=3600, refresh_margin=60)
+_session_id, _ = _session_manager.create({"access_token": ACCESS_TOKEN, "id_token": ID_TOKEN}, stubs.EMAIL)
+
+
+@case("sessions.resolve.memory", number=20000)
+def session_resolve():
+    _session_manager.resolve(_session_id)
+
+
+_SIGNUP_BODY = {"email": stubs.EMAIL, "password": "Str0ngP@ssw0rd!"}
+
+
+@case("validation.signup", number=5000)
+def validate_signup():
+    field_errors("SignupRequest", _SIGNUP_BODY)
+
+
+@case("password_policy.check", number=20000)
+def password_check():
+    check_password("Str0ngP@ssw0rd!", "SignUp")
+
+
+# -- Lambda entry point -----------------------------------------------------
+
+V2_EVENT = {
+    "version": "2.0",
+    "rawPath": "/me",
+    "headers": {"authorization": f"Bearer {ACCESS_TOKEN}", "host": "bench.lambda-url.us-east-1.on.aws"},
+    "queryStringParameters": None,
+    "body": None,
+    "isBase64Encoded": False,
+    "requestContext": {
+        "accountId": "123456789012",
+        "requestId": "bench",
+        "stage": "$default",
+        "http": {"method": "GET", "path": "/me", "sourceIp": "203.0.113.1"},
+    },
+}
+
+
+@case("lambda.normalize_event", number=20000)
+def normalize_event():
+    main.normalize_event(V2_EVENT)
+
+
+@case("lambda.handler.me", number=300, setup=_warm_keys)
+def lambda_handler_me():
+    main.lambda_handler(V2_EVENT, None)
+
+
+AUTHORIZER_EVENT = {
+    "type": "TOKEN",
+    "authorizationToken": f"Bearer {ACCESS_TOKEN}",
+    "methodArn": "arn:aws:execute-api:us-east-1:123456789012:abcdef1234/prod/GET/pets",
+}
+
+
+@case("authorizer.handler.policy", number=1000, setup=_warm_keys)
+def authorizer_policy():
+    authorizer.lambda_handler(AUTHORIZER_EVENT, None)
+
+
+@case("authorizer.handler.simple", number=1000, setup=_warm_keys)
+def authorizer_simple():
+    authorizer.authorize(AUTHORIZER_EVENT, mode="simple")
+
+
+# -- app construction -------------------------------------------------------
+
+@case("create_app", number=10)
+def build_app():
+    create_app()
+
+
+# -- full requests, one or more per blueprint -------------------------------
+
+def _json(body):
+    return {"data": json.dumps(body), "content_type": "application/json"}
+
+
+SIGNUP = _json({"email": stubs.EMAIL, "password": "Str0ngP@ssw0rd!"})
+CONFIRM = _json({"email": stubs.EMAIL, "code": "123456"})
+LOGIN = _json({"email": stubs.EMAIL, "password": "Str0ngP@ssw0rd!"})
+REFRESH = _json({"email": stubs.EMAIL, "refresh_token": "bench-refresh-token"})
+FORGOT = _json({"email": stubs.EMAIL})
+RESET = _json({"email": stubs.EMAIL, "code": "123456", "new_password": "EvenStrongerP@ss1"})
+PROFILE_UPDATE = _json({"name": "Bench User"})
+
+
+def _check(resp, status=200):
+    if resp.status_code != status and not _replaying:
+        raise AssertionError(f"{resp.request.path}: expected {status}, got {resp.status_code}: {resp.data[:200]!r}")
+
+
+@case("request.registration.signup", number=300)
+def request_signup():
+    _check(client.post("/auth/signup", **SIGNUP))
+
+
+SIGNUP_INVALID = _json({"email": "not-an-email", "password": ""})
+
+
+@case("request.registration.signup.invalid", number=300)
+def request_signup_invalid():
+    _check(client.post("/auth/signup", **SIGNUP_INVALID), 400)
+
+
+SIGNUP_WEAK = _json({"email": stubs.EMAIL, "password": "weakpassword"})
+
+
+@case("request.registration.signup.weak_password", number=300)
+def request_signup_weak():
+    _check(client.post("/auth/signup", **SIGNUP_WEAK), 400)
+
+
+@case("request.registration.signup.replayed", number=300)
+def request_signup_replayed():
+    _check(client.post("/auth/signup", headers={"Idempotency-Key": "bench-replay"}, **SIGNUP))
+
+
+@case("request.registration.confirm", number=300)
+def request_confirm():
+    _check(client.post("/auth/confirm", **CONFIRM))
+
+
+@case("request.session.login", number=100)
+def request_login():
+    _check(client.post("/auth/login", **LOGIN))
+
+
+@case("request.session.refresh", number=100)
+def request_refresh():
+    _check(client.post("/auth/refresh", **REFRESH))
+
+
+@case("request.session.me", number=300, setup=_warm_keys)
+def request_me():
+    _check(client.get("/me", headers=AUTH_HEADERS))
+
+
+_me_etag = {}
+
+
+def _prime_me():
+    _warm_keys()
+    _me_etag["value"] = client.get("/me", headers=AUTH_HEADERS).headers["ETag"]
+
+
+@case("request.session.me.not_modified", number=300, setup=_prime_me)
+def request_me_304():
+    _check(client.get("/me", headers={**AUTH_HEADERS, "If-None-Match": _me_etag["value"]}), 304)
+
+
+@case("request.password.forgot", number=300)
+def request_forgot():
+    _check(client.post("/auth/forgot-password", **FORGOT))
+
+
+@case("request.password.reset", number=300)
+def request_reset():
+    _check(client.post("/auth/reset-password", **RESET))
+
+
+@case("request.profile.get", number=300, setup=_warm_keys)
+def request_profile_get():
+    _check(client.get("/profile", headers=AUTH_HEADERS))
+
+
+_profile_etag = {}
+
+
+def _prime_profile():
+    _warm_keys()
+    _profile_etag["value"] = client.get("/profile", headers=AUTH_HEADERS).headers["ETag"]
+
+
+@case("request.profile.get.not_modified", number=300, setup=_prime_profile)
+def request_profile_304():
+    _check(client.get("/profile", headers={**AUTH_HEADERS, "If-None-Match": _profile_etag["value"]}), 304)
+
+
+def _clear_profile_parts():
+    for part in profile_parts.parts.values():
+        part.cache.clear()
+
+
+@case("request.profile.get.enriched", number=200, setup=_warm_keys)
+def request_profile_enriched():
+    _clear_profile_parts()
+    _check(client.get("/profile?include=groups,devices", headers=AUTH_HEADERS))
+
+
+@case("request.profile.get.enriched.cached", number=300, setup=_warm_keys)
+def request_profile_enriched_cached():
+    _check(client.get("/profile?include=groups,devices", headers=AUTH_HEADERS))
+
+
+@case("request.profile.update", number=300, setup=_warm_keys)
+def request_profile_update():
+    _check(client.post("/profile", headers=AUTH_HEADERS, **PROFILE_UPDATE))
+
+
+@case("request.social.start", number=1000)
+def request_google_start():
+    _check(client.get("/auth/google/start"), 302)
+
+
+@case("request.social.callback", number=100)
+def request_google_callback():
+    _check(client.get("/auth/google/callback?code=bench"))
+
+
+# -- gateway subrequests ------------------------------------------------------
+
+def _prime_gateway():
+    _warm_keys()
+    gateway.decide(ACCESS_TOKEN)
+
+
+@case("gateway.decide.cached", number=50000, setup=_prime_gateway)
+def gateway_decide_cached():
+    gateway.decide(ACCESS_TOKEN)
+
+
+@case("request.gateway.check", number=1000, setup=_prime_gateway)
+def request_gateway_check():
+    _check(client.get("/auth/check", headers=AUTH_HEADERS))
+
+
+@case("request.gateway.check.denied", number=1000)
+def request_gateway_denied():
+    _check(client.get("/auth/check", headers={"Authorization": "Bearer not-a-token"}), 401)
+
+
+# -- batch -------------------------------------------------------------------
+
+BATCH = _json({"steps": [
+    {"id": "login", "method": "POST", "path": "/auth/login", "body": json.loads(LOGIN["data"])},
+    {"id": "profile", "path": "/profile", "headers": {"Authorization": "Bearer {{login.access_token}}"}},
+    {"id": "me", "path": "/me", "headers": {"Authorization": "Bearer {{login.access_token}}"}},
+]})
+
+
+@case("request.batch.login_profile_me", number=100, setup=_warm_keys)
+def request_batch():
+    resp = client.post("/batch", **BATCH)
+    _check(resp)
+    for result in resp.get_json()["results"]:
+        if result["status"] != 200 and not _replaying:
+            raise AssertionError(f"/batch step {result['id']}: got {result['status']}: {result['body']}")
+
+
+# -- auth-event log -----------------------------------------------------------
+
+_event_log = EventLog(lambda batch: None, capacity=100000, batch_size=256, flush_interval=1.0)
+_logged_app = create_app()
+init_auth_events(_logged_app, _event_log)
+_logged_client = _logged_app.test_client()
+_EVENT = {"event": "login", "outcome": "success", "status": 200, "route": "/auth/login"}
+
+
+@case("auth_events.emit", number=20000, teardown=_event_log.close)
+def auth_event_emit():
+    _event_log.emit(_EVENT)
+
+
+@case("request.session.login.logged", number=100, teardown=_event_log.close)
+def request_login_logged():
+    _check(_logged_client.post("/auth/login", **LOGIN))
+
+
+# -- admission control ---------------------------------------------------------
+
+_admitted_app = create_app()
+init_admission(_admitted_app, build_gates())
+_admitted_client = _admitted_app.test_client()
+
+
+@case("request.session.login.admitted", number=100)
+def request_login_admitted():
+    _check(_admitted_client.post("/auth/login", **LOGIN))
+
+
+@case("request.session.me.admitted", number=300, setup=_warm_keys)
+def request_me_admitted():
+    _check(_admitted_client.get("/me", headers=AUTH_HEADERS))
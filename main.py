@@ -6,7 +6,8 @@ import serverless_wsgi
 
 flask_app = create_app()
 
-def lambda_handler(event, context):
+
+def normalize_event(event):
     # Normalize Lambda Function URL / HTTP API v2 events into REST-style shape for serverless-wsgi
     # This handles the "version": "2.0" format used by Function URLs.
     if event.get("version") == "2.0" and "httpMethod" not in event:
@@ -32,8 +33,11 @@ def lambda_handler(event, context):
                 "requestId": rc.get("requestId"),
             },
         }
+    return event
 
-    return serverless_wsgi.handle_request(flask_app, event, context)
+
+def lambda_handler(event, context):
+    return serverless_wsgi.handle_request(flask_app, normalize_event(event), context)
 
 
 # Optional: local dev
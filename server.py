@@ -0,0 +1,124 @@
+"""Long-running HTTP server for container deployments.
+
+``main.lambda_handler`` serves Lambda and ``python main.py`` runs Flask's
+development server; this runs the same app under gunicorn:
+
+    python server.py
+
+The workload is I/O bound (most requests wait on Cognito), so the default
+``gthread`` worker runs several threads per botocore pool connection:
+local-only routes (``/me``, cached ``/profile``, ``/metrics``) never take a
+pool connection, so sizing threads to the pool alone leaves the CPU idle
+while Cognito answers. ``gevent`` swaps threads for greenlets and allows
+more concurrent waits per process. Workers default to one per CPU (``2 * CPU + 1`` for
+``sync``), everything is overridable through ``SERVER_*`` settings.
+
+The app and its signing keys are loaded once in the master before workers
+fork, and SIGTERM drains in-flight requests for ``SERVER_GRACEFUL_TIMEOUT``.
+Background job workers start in each worker after the fork, never in the
+master. ``ASYNC_DISPATCH=memory`` keeps jobs in one process, so it requires
+``SERVER_WORKERS=1``.
+"""
+
+import logging
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+if os.getenv("SERVER_WORKER_CLASS") == "gevent":
+    # Must run before anything imports ssl, socket or threading users
+    from gevent import monkey
+
+    monkey.patch_all()
+
+from gunicorn.app.base import BaseApplication  # noqa: E402
+
+from app.config import settings  # noqa: E402
+
+# gunicorn's error log, so these messages follow the server's log settings
+logger = logging.getLogger("gunicorn.error")
+
+
+def server_options(cpus=None):
+    """gunicorn settings derived from CPU count and the botocore pool size."""
+
+    cpus = cpus or os.cpu_count() or 1
+    pool = settings.cognito_max_pool_connections
+    worker_class = settings.server_worker_class
+
+    if worker_class == "sync":
+        workers = 2 * cpus + 1
+    else:
+        workers = cpus
+
+    workers = settings.server_workers or workers
+    if settings.async_dispatch == "memory" and workers > 1:
+        raise RuntimeError(
+            "ASYNC_DISPATCH=memory keeps jobs in one process, so job status would 404 on other workers; "
+            "use ASYNC_DISPATCH=sqlite or SERVER_WORKERS=1"
+        )
+
+    options = {
+        "bind": settings.server_bind,
+        "worker_class": worker_class,
+        "workers": workers,
+        "timeout": settings.server_timeout,
+        "graceful_timeout": settings.server_graceful_timeout,
+        "keepalive": 5,
+        "preload_app": True,
+        "accesslog": None,
+        "errorlog": "-",
+    }
+    if worker_class == "gthread":
+        options["threads"] = settings.server_threads or pool * 4
+    elif worker_class == "gevent":
+        options["worker_connections"] = settings.server_worker_connections or pool * 10
+    return options
+
+
+def _preload():
+    """Warm shared state in the master so every forked worker inherits it."""
+
+    from app.cognito import get_oidc_config, key_store
+
+    try:
+        key_store.jwks()
+    except Exception as exc:  # workers will fetch lazily instead
+        logger.warning("Could not preload signing keys: %s", exc)
+    try:
+        get_oidc_config()
+    except Exception as exc:
+        logger.warning("Could not preload OIDC configuration: %s", exc)
+
+
+def _post_fork(server, worker):
+    from app import jobs
+
+    if jobs.queue:
+        jobs.queue.after_fork()
+        jobs.queue.start()  # not started in the master, see Server.load
+
+
+class Server(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("post_fork", _post_fork)
+
+    def load(self):
+        from app import create_app
+
+        # Job worker threads must not run in the arbiter or be live across fork
+        flask_app = create_app(start_jobs=False)
+        _preload()
+        return flask_app
+
+
+if __name__ == "__main__":
+    Server(server_options()).run()